@@ -0,0 +1,52 @@
+"""Reject overlapping meetings for the same host
+
+Revision ID: 0b8e2c6d4a71
+Revises: f19a3d5c8b20
+Create Date: 2025-08-15 10:18:36.092245
+
+Existing double-bookings must be cleaned up before this revision can be applied; upgrade
+lists them and stops without changing anything if any are found.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b8e2c6d4a71'
+down_revision: Union[str, Sequence[str], None] = 'f19a3d5c8b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    overlaps = op.get_bind().execute(sa.text(
+        "SELECT a.host_email, a.meeting_id, a.start_time, a.end_time, b.meeting_id, b.start_time, b.end_time "
+        "FROM scheduled_meetings a JOIN scheduled_meetings b "
+        "ON a.host_email = b.host_email AND a.meeting_id < b.meeting_id "
+        "AND tsrange(a.start_time, a.end_time) && tsrange(b.start_time, b.end_time) "
+        "ORDER BY a.host_email, a.start_time"
+    )).fetchall()
+    if overlaps:
+        listing = "\n".join(
+            f"  {host}: {id_a} ({start_a} - {end_a}) overlaps {id_b} ({start_b} - {end_b})"
+            for host, id_a, start_a, end_a, id_b, start_b, end_b in overlaps[:50]
+        )
+        more = f"\n  ... and {len(overlaps) - 50} more" if len(overlaps) > 50 else ""
+        raise RuntimeError(
+            f"Cannot add excl_scheduled_meetings_host_overlap: {len(overlaps)} overlapping bookings "
+            f"for the same host. Cancel or reschedule these, then upgrade again:\n{listing}{more}"
+        )
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute(
+        "ALTER TABLE scheduled_meetings ADD CONSTRAINT excl_scheduled_meetings_host_overlap "
+        "EXCLUDE USING gist (host_email WITH =, tsrange(start_time, end_time) WITH &&)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE scheduled_meetings DROP CONSTRAINT excl_scheduled_meetings_host_overlap")
@@ -0,0 +1,39 @@
+"""Add transcript_cache table and audio hash checkpoint
+
+Revision ID: 7d5f0e9a2b63
+Revises: 0b8e2c6d4a71
+Create Date: 2025-08-18 13:47:12.386021
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d5f0e9a2b63'
+down_revision: Union[str, Sequence[str], None] = '0b8e2c6d4a71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('transcript_cache',
+    sa.Column('audio_sha256', sa.String(length=64), nullable=False),
+    sa.Column('transcript', sa.Text(), nullable=False),
+    sa.Column('hit_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_hit_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('audio_sha256')
+    )
+    op.create_index(op.f('ix_transcript_cache_created_at'), 'transcript_cache', ['created_at'], unique=False)
+    op.add_column('meeting_pipeline_state', sa.Column('audio_sha256', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('meeting_pipeline_state', 'audio_sha256')
+    op.drop_index(op.f('ix_transcript_cache_created_at'), table_name='transcript_cache')
+    op.drop_table('transcript_cache')
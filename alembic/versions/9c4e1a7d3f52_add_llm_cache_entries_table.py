@@ -0,0 +1,39 @@
+"""Add llm_cache_entries table
+
+Revision ID: 9c4e1a7d3f52
+Revises: 7d5f0e9a2b63
+Create Date: 2025-08-19 10:21:44.905172
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e1a7d3f52'
+down_revision: Union[str, Sequence[str], None] = '7d5f0e9a2b63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('llm_cache_entries',
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('model', sa.String(), nullable=False),
+    sa.Column('template_version', sa.String(), nullable=False),
+    sa.Column('response', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('hit_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_used_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('cache_key')
+    )
+    op.create_index(op.f('ix_llm_cache_entries_last_used_at'), 'llm_cache_entries', ['last_used_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_llm_cache_entries_last_used_at'), table_name='llm_cache_entries')
+    op.drop_table('llm_cache_entries')
@@ -0,0 +1,37 @@
+"""Add meeting_pipeline_state table
+
+Revision ID: a3c8e1f04b57
+Revises: 5f2a9c1d7e34
+Create Date: 2025-08-12 15:03:27.640192
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c8e1f04b57'
+down_revision: Union[str, Sequence[str], None] = '5f2a9c1d7e34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('meeting_pipeline_state',
+    sa.Column('meeting_id', sa.String(), nullable=False),
+    sa.Column('stage', sa.String(length=30), nullable=False),
+    sa.Column('audio_blob_path', sa.Text(), nullable=True),
+    sa.Column('transcript', sa.Text(), nullable=True),
+    sa.Column('summary', sa.Text(), nullable=True),
+    sa.Column('recipients', sa.Text(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('meeting_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('meeting_pipeline_state')
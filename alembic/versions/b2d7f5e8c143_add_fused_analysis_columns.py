@@ -0,0 +1,30 @@
+"""Add fused_analysis to meeting_logs and meeting_pipeline_state
+
+Revision ID: b2d7f5e8c143
+Revises: 9c4e1a7d3f52
+Create Date: 2025-08-19 16:02:31.557810
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d7f5e8c143'
+down_revision: Union[str, Sequence[str], None] = '9c4e1a7d3f52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('meeting_logs', sa.Column('fused_analysis', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.add_column('meeting_pipeline_state', sa.Column('fused_analysis', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('meeting_pipeline_state', 'fused_analysis')
+    op.drop_column('meeting_logs', 'fused_analysis')
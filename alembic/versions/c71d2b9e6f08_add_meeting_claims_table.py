@@ -0,0 +1,34 @@
+"""Add meeting_claims table
+
+Revision ID: c71d2b9e6f08
+Revises: a3c8e1f04b57
+Create Date: 2025-08-13 09:41:55.208711
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c71d2b9e6f08'
+down_revision: Union[str, Sequence[str], None] = 'a3c8e1f04b57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('meeting_claims',
+    sa.Column('meeting_id', sa.String(), nullable=False),
+    sa.Column('owner', sa.String(), nullable=False),
+    sa.Column('claimed_at', sa.DateTime(), nullable=False),
+    sa.Column('lease_expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('meeting_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('meeting_claims')
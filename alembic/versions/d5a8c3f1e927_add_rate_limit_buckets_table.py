@@ -0,0 +1,36 @@
+"""Add rate_limit_buckets table
+
+Revision ID: d5a8c3f1e927
+Revises: b2d7f5e8c143
+Create Date: 2025-08-21 09:38:05.214630
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a8c3f1e927'
+down_revision: Union[str, Sequence[str], None] = 'b2d7f5e8c143'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('rate_limit_buckets',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('request_tokens', sa.Float(), nullable=False),
+    sa.Column('token_tokens', sa.Float(), nullable=False),
+    sa.Column('backoff_seconds', sa.Float(), nullable=False),
+    sa.Column('backoff_until', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rate_limit_buckets')
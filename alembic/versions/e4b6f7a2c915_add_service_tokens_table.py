@@ -0,0 +1,33 @@
+"""Add service_tokens table
+
+Revision ID: e4b6f7a2c915
+Revises: c71d2b9e6f08
+Create Date: 2025-08-14 11:20:08.553174
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b6f7a2c915'
+down_revision: Union[str, Sequence[str], None] = 'c71d2b9e6f08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('service_tokens',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('access_token', sa.Text(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('service_tokens')
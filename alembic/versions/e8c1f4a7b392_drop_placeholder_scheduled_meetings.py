@@ -0,0 +1,61 @@
+"""Drop placeholder scheduled meetings and restore the full host overlap constraint
+
+Revision ID: e8c1f4a7b392
+Revises: d5a8c3f1e927
+Create Date: 2025-08-22 11:04:17.603918
+
+The legacy participants importer used to insert scheduled_meetings rows with no topic or
+times, and a copy of 0b8e2c6d4a71 limited the exclusion constraint to rows with both times
+set so those rows could exist. The importer now only fills in existing meetings, so the
+placeholder rows are removed (their data is still in the data/participants_*.json files) and
+the constraint is recreated without the predicate on every database.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c1f4a7b392'
+down_revision: Union[str, Sequence[str], None] = 'd5a8c3f1e927'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        "DELETE FROM scheduled_meetings "
+        "WHERE topic IS NULL AND start_time IS NULL AND end_time IS NULL"
+    )
+    # The partial constraint let rows with only one of the times set through; those now overlap.
+    overlaps = op.get_bind().execute(sa.text(
+        "SELECT a.host_email, a.meeting_id, b.meeting_id "
+        "FROM scheduled_meetings a JOIN scheduled_meetings b "
+        "ON a.host_email = b.host_email AND a.meeting_id < b.meeting_id "
+        "AND tsrange(a.start_time, a.end_time) && tsrange(b.start_time, b.end_time) "
+        "ORDER BY a.host_email"
+    )).fetchall()
+    if overlaps:
+        listing = "\n".join(f"  {host}: {id_a} overlaps {id_b}" for host, id_a, id_b in overlaps[:50])
+        raise RuntimeError(
+            f"Cannot restore excl_scheduled_meetings_host_overlap: {len(overlaps)} overlapping bookings "
+            f"for the same host. Fix their times or remove them, then upgrade again:\n{listing}"
+        )
+    _recreate_overlap_constraint()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Leaves the constraint as 0b8e2c6d4a71 defines it, which is what revisions before this one
+    # expect. The deleted placeholder rows are not restored; they are not real bookings.
+    _recreate_overlap_constraint()
+
+
+def _recreate_overlap_constraint() -> None:
+    op.execute("ALTER TABLE scheduled_meetings DROP CONSTRAINT IF EXISTS excl_scheduled_meetings_host_overlap")
+    op.execute(
+        "ALTER TABLE scheduled_meetings ADD CONSTRAINT excl_scheduled_meetings_host_overlap "
+        "EXCLUDE USING gist (host_email WITH =, tsrange(start_time, end_time) WITH &&)"
+    )
@@ -0,0 +1,31 @@
+"""Add end_time and host window index to scheduled_meetings
+
+Revision ID: f19a3d5c8b20
+Revises: e4b6f7a2c915
+Create Date: 2025-08-15 10:02:51.770416
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f19a3d5c8b20'
+down_revision: Union[str, Sequence[str], None] = 'e4b6f7a2c915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('scheduled_meetings', sa.Column('end_time', sa.DateTime(), nullable=True))
+    op.execute("UPDATE scheduled_meetings SET end_time = start_time + duration * interval '1 minute'")
+    op.create_index('idx_scheduled_meetings_host_window', 'scheduled_meetings', ['host_email', 'start_time', 'end_time'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_scheduled_meetings_host_window', table_name='scheduled_meetings')
+    op.drop_column('scheduled_meetings', 'end_time')
@@ -1,19 +1,53 @@
 # backend/api.py
 from pydantic import BaseModel
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
-import os, json, traceback
-from pathlib import Path
-from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+import os, json, time, threading, traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 
 from models import ScheduledMeeting
 from frontend.db import get_db
 from backend.webhook import router as webhook_router
-from common.zoom_api import create_zoom_meeting, is_host_available, cancel_zoom_meeting
+from common.transcript_cache import get_cache_stats
+from common.zoom_api import (
+    create_zoom_meeting, is_host_available, cancel_zoom_meeting, get_free_busy,
+    get_busy_intervals, parse_meeting_window
+)
 
 app = FastAPI()
 app.include_router(webhook_router)
 
+# Short-lived cache for the free/busy grid. Cleared whenever this process creates or cancels
+# a meeting; the TTL bounds staleness from changes made by other replicas.
+AVAILABILITY_CACHE_SECONDS = int(os.getenv("AVAILABILITY_CACHE_SECONDS", "30"))
+AVAILABILITY_MAX_WINDOW_DAYS = 31
+# Bulk endpoints: largest accepted batch and how many Zoom calls run at once.
+MAX_BATCH_SIZE = 100
+ZOOM_CONCURRENCY = int(os.getenv("ZOOM_CONCURRENCY", "5"))
+# Sync endpoints run in FastAPI's threadpool, so every access to the cache holds the lock.
+# The generation changes on each invalidation; a result computed before a booking or
+# cancellation committed is then not stored.
+_availability_lock = threading.Lock()
+_availability_cache = {}
+_availability_generation = 0
+
+def invalidate_availability_cache():
+    global _availability_generation
+    with _availability_lock:
+        _availability_cache.clear()
+        _availability_generation += 1
+
+def _parse_utc(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _iso_utc(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
 class MeetingRequest(BaseModel):
     topic: str
     start_time: str
@@ -23,18 +57,95 @@ class MeetingRequest(BaseModel):
     host_email: str
     created_by_email: str
 
+class BulkMeetingRequest(BaseModel):
+    meetings: list[MeetingRequest]
+
+class BulkCancelRequest(BaseModel):
+    meeting_ids: list[str]
+
 @app.get("/api/test")
 async def test():
     return {"status": "✅ FastAPI is working with GET"}
 
+@app.get("/api/stats/transcript-cache")
+def transcript_cache_stats(db: Session = Depends(get_db)):
+    return get_cache_stats(db)
+
+@app.get("/api/hosts/availability")
+def hosts_availability(
+    start: str = Query(..., description="Window start, ISO 8601"),
+    end: str = Query(..., description="Window end, ISO 8601"),
+    min_slot_minutes: int = Query(15, ge=1, le=1440),
+    db: Session = Depends(get_db)
+):
+    try:
+        window_start, window_end = _parse_utc(start), _parse_utc(end)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and end must be ISO 8601 timestamps.")
+    if window_end <= window_start:
+        raise HTTPException(status_code=400, detail="end must be after start.")
+    if window_end - window_start > timedelta(days=AVAILABILITY_MAX_WINDOW_DAYS):
+        raise HTTPException(status_code=400, detail=f"Window cannot exceed {AVAILABILITY_MAX_WINDOW_DAYS} days.")
+
+    cache_key = (window_start, window_end, min_slot_minutes)
+    with _availability_lock:
+        cached = _availability_cache.get(cache_key)
+        generation = _availability_generation
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    schedule = get_free_busy(db, window_start, window_end, min_slot_minutes)
+    result = {
+        "start": _iso_utc(window_start),
+        "end": _iso_utc(window_end),
+        "hosts": {
+            host: {
+                "busy": [{"start": _iso_utc(s), "end": _iso_utc(e)} for s, e in slots["busy"]],
+                "free": [{"start": _iso_utc(s), "end": _iso_utc(e)} for s, e in slots["free"]]
+            }
+            for host, slots in schedule.items()
+        }
+    }
+    with _availability_lock:
+        if generation == _availability_generation:
+            now = time.monotonic()
+            if len(_availability_cache) > 256:
+                for key in [k for k, (expires, _) in _availability_cache.items() if expires <= now]:
+                    _availability_cache.pop(key, None)
+            _availability_cache[cache_key] = (now + AVAILABILITY_CACHE_SECONDS, result)
+    return result
+
+def _zoom_payload(meeting: MeetingRequest) -> dict:
+    return {
+        "topic": meeting.topic, "type": 2, "start_time": meeting.start_time,
+        "duration": meeting.duration, "agenda": meeting.agenda,
+        "settings": {"auto_recording": "cloud", "join_before_host": False, "waiting_room": True, "mute_upon_entry": True, "approval_type": 0, "registration_type": 1,"participant_video": True}
+    }
+
+def _scheduled_meeting_row(meeting: MeetingRequest, host_email: str, zoom_meeting_id) -> ScheduledMeeting:
+    start_time = datetime.fromisoformat(meeting.start_time.replace("Z", "+00:00"))
+    return ScheduledMeeting(
+        meeting_id=zoom_meeting_id,
+        topic=meeting.topic,
+        start_time=start_time,
+        end_time=start_time + timedelta(minutes=meeting.duration),
+        duration=meeting.duration,
+        agenda=meeting.agenda,
+        participants=json.dumps(meeting.participants),
+        host_email=host_email,
+        created_by_email=meeting.created_by_email
+    )
+
+def _meeting_response(result: dict, meeting: MeetingRequest, host_email: str) -> dict:
+    return {
+        "id": result["id"], "join_url": result["join_url"], "start_url": result["start_url"],
+        "start_time": result["start_time"], "duration": result["duration"],
+        "created_by_email": meeting.created_by_email, "form_host_email": host_email
+    }
+
 @app.post("/api/create-meeting")
 def create_meeting(meeting: MeetingRequest, db: Session = Depends(get_db)):
     try:
-        payload = {
-            "topic": meeting.topic, "type": 2, "start_time": meeting.start_time,
-            "duration": meeting.duration, "agenda": meeting.agenda,
-            "settings": {"auto_recording": "cloud", "join_before_host": False, "waiting_room": True, "mute_upon_entry": True, "approval_type": 0, "registration_type": 1,"participant_video": True}
-        }
         host_email = meeting.host_email.strip()
         if not host_email:
             raise HTTPException(status_code=400, detail="Please select a valid host email.")
@@ -43,37 +154,24 @@ def create_meeting(meeting: MeetingRequest, db: Session = Depends(get_db)):
                 status_code=409,
                 detail=f"Requested host '{host_email}' is busy. Please select another host or time."
             )
-        result = create_zoom_meeting(payload, host_email)
+        result = create_zoom_meeting(_zoom_payload(meeting), host_email)
         if not result or "id" not in result:
             raise HTTPException(status_code=500, detail="Failed to create Zoom meeting.")
         
-        new_meeting = ScheduledMeeting(
-            meeting_id=result["id"],
-            topic=meeting.topic,
-            start_time=datetime.fromisoformat(meeting.start_time.replace("Z", "+00:00")),
-            duration=meeting.duration,
-            agenda=meeting.agenda,
-            participants=json.dumps(meeting.participants),
-            host_email=host_email,
-            created_by_email=meeting.created_by_email
-        )
-        db.add(new_meeting)
-        db.commit()
+        db.add(_scheduled_meeting_row(meeting, host_email, result["id"]))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another request booked this host for an overlapping slot after our availability check.
+            db.rollback()
+            cancel_zoom_meeting(str(result["id"]))
+            raise HTTPException(
+                status_code=409,
+                detail=f"Requested host '{host_email}' is busy. Please select another host or time."
+            )
+        invalidate_availability_cache()
         
-        os.makedirs("data", exist_ok=True)
-        participants_path = Path(f"data/participants_{result['id']}.json")
-        with open(participants_path, "w") as f:
-            json.dump({
-                "emails": meeting.participants,
-                "created_by_email": meeting.created_by_email,
-                "form_host_email": host_email
-            }, f)
-            
-        return {
-            "id": result["id"], "join_url": result["join_url"], "start_url": result["start_url"],
-            "start_time": result["start_time"], "duration": result["duration"],
-            "created_by_email": meeting.created_by_email, "form_host_email": host_email
-        }
+        return _meeting_response(result, meeting, host_email)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -81,6 +179,98 @@ def create_meeting(meeting: MeetingRequest, db: Session = Depends(get_db)):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.post("/api/create-meetings")
+def create_meetings(batch: BulkMeetingRequest, db: Session = Depends(get_db)):
+    """
+    Creates a batch of meetings (e.g. a weekly series). Availability for the whole batch is
+    checked in one DB query, Zoom is called concurrently and all rows are inserted together.
+    Returns one result per requested meeting, in request order.
+    """
+    if not batch.meetings:
+        raise HTTPException(status_code=400, detail="No meetings supplied.")
+    if len(batch.meetings) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"A batch can contain at most {MAX_BATCH_SIZE} meetings.")
+
+    try:
+        results = [None] * len(batch.meetings)
+        windows = {}
+        for i, meeting in enumerate(batch.meetings):
+            host_email = meeting.host_email.strip()
+            if not host_email:
+                results[i] = {"index": i, "status": "invalid", "detail": "Please select a valid host email."}
+                continue
+            try:
+                start_time, end_time = parse_meeting_window(meeting.start_time, meeting.duration)
+            except ValueError:
+                results[i] = {"index": i, "status": "invalid", "detail": "start_time must be an ISO 8601 timestamp."}
+                continue
+            windows[i] = (host_email, start_time, end_time)
+
+        # --- 1. One availability pass for the whole batch ---
+        accepted = []
+        if windows:
+            busy = get_busy_intervals(
+                db,
+                list({host for host, _, _ in windows.values()}),
+                min(start for _, start, _ in windows.values()),
+                max(end for _, _, end in windows.values())
+            )
+            for i, (host_email, start_time, end_time) in windows.items():
+                if any(s < end_time and e > start_time for s, e in busy[host_email]):
+                    results[i] = {"index": i, "status": "busy", "detail": f"Requested host '{host_email}' is busy."}
+                    continue
+                # Later items in the same batch must not overlap the ones already accepted.
+                busy[host_email].append((start_time, end_time))
+                accepted.append(i)
+
+        # --- 2. Concurrent Zoom calls ---
+        def create_one(i):
+            try:
+                return i, create_zoom_meeting(_zoom_payload(batch.meetings[i]), windows[i][0]), None
+            except Exception as e:
+                return i, None, str(e)
+
+        with ThreadPoolExecutor(max_workers=ZOOM_CONCURRENCY) as pool:
+            created = list(pool.map(create_one, accepted))
+
+        rows = {}
+        for i, result, error in created:
+            if error or not result or "id" not in result:
+                results[i] = {"index": i, "status": "error", "detail": error or "Failed to create Zoom meeting."}
+                continue
+            rows[i] = (_scheduled_meeting_row(batch.meetings[i], windows[i][0], result["id"]), result)
+
+        # --- 3. Single bulk insert ---
+        db.add_all([row for row, _ in rows.values()])
+        try:
+            db.commit()
+            inserted = set(rows)
+        except IntegrityError:
+            # A concurrent booking slipped in; fall back to per-row inserts to find the clashes.
+            db.rollback()
+            inserted = set()
+            for i, (row, result) in rows.items():
+                db.add(_scheduled_meeting_row(batch.meetings[i], windows[i][0], result["id"]))
+                try:
+                    db.commit()
+                    inserted.add(i)
+                except IntegrityError:
+                    db.rollback()
+                    cancel_zoom_meeting(str(result["id"]))
+                    results[i] = {"index": i, "status": "busy", "detail": f"Requested host '{windows[i][0]}' is busy."}
+        if inserted:
+            invalidate_availability_cache()
+
+        for i in inserted:
+            meeting, result = batch.meetings[i], rows[i][1]
+            results[i] = {"index": i, "status": "created", "meeting": _meeting_response(result, meeting, windows[i][0])}
+
+        return {"created": len(inserted), "results": results}
+    except Exception as e:
+        print(f"[❌ Exception creating meetings in bulk]: {e}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @app.delete("/api/cancel-meeting/{meeting_id}")
 def cancel_meeting(meeting_id: str, db: Session = Depends(get_db)):
     try:
@@ -89,8 +279,48 @@ def cancel_meeting(meeting_id: str, db: Session = Depends(get_db)):
         if meeting_to_delete:
             db.delete(meeting_to_delete)
             db.commit()
+            invalidate_availability_cache()
         return {"status": "cancelled"}
     except Exception as e:
         print(f"[❌ Cancel error] {e}")
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/cancel-meetings")
+def cancel_meetings(batch: BulkCancelRequest, db: Session = Depends(get_db)):
+    """Cancels a batch of meetings concurrently in Zoom, then deletes the cancelled ones in one statement."""
+    meeting_ids = list(dict.fromkeys(str(m) for m in batch.meeting_ids))
+    if not meeting_ids:
+        raise HTTPException(status_code=400, detail="No meeting ids supplied.")
+    if len(meeting_ids) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"A batch can contain at most {MAX_BATCH_SIZE} meetings.")
+
+    def cancel_one(meeting_id):
+        try:
+            cancel_zoom_meeting(meeting_id)
+            return meeting_id, None
+        except Exception as e:
+            return meeting_id, str(e)
+
+    try:
+        with ThreadPoolExecutor(max_workers=ZOOM_CONCURRENCY) as pool:
+            outcomes = list(pool.map(cancel_one, meeting_ids))
+
+        cancelled = [meeting_id for meeting_id, error in outcomes if not error]
+        if cancelled:
+            db.query(ScheduledMeeting).filter(ScheduledMeeting.meeting_id.in_(cancelled)).delete(synchronize_session=False)
+            db.commit()
+            invalidate_availability_cache()
+
+        return {
+            "cancelled": len(cancelled),
+            "results": [
+                {"meeting_id": meeting_id, "status": "error", "detail": error} if error
+                else {"meeting_id": meeting_id, "status": "cancelled"}
+                for meeting_id, error in outcomes
+            ]
+        }
+    except Exception as e:
+        print(f"[❌ Bulk cancel error] {e}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
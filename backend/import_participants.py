@@ -0,0 +1,57 @@
+# backend/import_participants.py
+# One-off importer for the legacy data/participants_{meeting_id}.json files.
+# Run with: python -m backend.import_participants [data_dir]
+# Only meetings that already exist in scheduled_meetings are filled in; files for unknown
+# meetings are reported and skipped, since a row without a topic or times is not a real booking.
+import sys, json
+from pathlib import Path
+
+from models import ScheduledMeeting
+from frontend.db import SessionLocal
+
+def import_participants(data_dir: str = "data"):
+    db = SessionLocal()
+    updated, missing, skipped = 0, 0, 0
+    try:
+        for path in sorted(Path(data_dir).glob("participants_*.json")):
+            meeting_id = path.stem.replace("participants_", "", 1)
+            with open(path, "r") as f:
+                data = json.load(f)
+
+            emails = data.get("emails", [])
+            created_by_email = data.get("created_by_email")
+            host_email = data.get("form_host_email")
+
+            meeting = db.query(ScheduledMeeting).filter(ScheduledMeeting.meeting_id == meeting_id).first()
+            if not meeting:
+                print(f"[⚠️ Import] No scheduled meeting {meeting_id}; skipping {path.name}")
+                missing += 1
+                continue
+
+            # Never overwrite what the DB already knows; only fill gaps.
+            changed = False
+            if not meeting.participants and emails:
+                meeting.participants = json.dumps(emails)
+                changed = True
+            if not meeting.created_by_email and created_by_email:
+                meeting.created_by_email = created_by_email
+                changed = True
+            if not meeting.host_email and host_email:
+                meeting.host_email = host_email
+                changed = True
+            if changed:
+                updated += 1
+            else:
+                skipped += 1
+
+        db.commit()
+        print(f"[✅ Import] {updated} updated, {skipped} already up to date, {missing} without a scheduled meeting.")
+    except Exception as e:
+        db.rollback()
+        print(f"[❌ Import failed] {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    import_participants(sys.argv[1] if len(sys.argv) > 1 else "data")
@@ -0,0 +1,140 @@
+# backend/jobs.py
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from models import ProcessingJob, MeetingClaim
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# A running job whose lease has not been renewed within this window is considered
+# abandoned (crashed/killed worker) and can be claimed again.
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "600"))
+# While a job runs, its worker renews the job lease and the meeting claim this often, so a
+# long recording never outlives its lease. Keep it well below both lease lengths.
+JOB_HEARTBEAT_SECONDS = int(os.getenv("JOB_HEARTBEAT_SECONDS", "60"))
+JOB_RETRY_BACKOFF_SECONDS = int(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "60"))
+# How long a meeting claim stays valid if its holder dies without releasing it.
+CLAIM_LEASE_SECONDS = int(os.getenv("CLAIM_LEASE_SECONDS", str(JOB_LEASE_SECONDS)))
+
+def enqueue_job(db: Session, meeting_id: str, event_type: str, payload: dict) -> ProcessingJob:
+    """Persists a webhook event so a worker can process it outside the request."""
+    job = ProcessingJob(
+        meeting_id=meeting_id,
+        event_type=event_type,
+        payload=payload,
+        status=JOB_PENDING,
+        attempts=0,
+        available_at=datetime.utcnow()
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    print(f"[📥 Job queued] Job {job.id} for meeting {meeting_id}")
+    return job
+
+def claim_next_job(db: Session, worker_id: str):
+    """
+    Atomically claims the oldest runnable job for this worker.
+    FOR UPDATE SKIP LOCKED lets many workers poll the table without blocking each other
+    or handing the same job out twice.
+    """
+    now = datetime.utcnow()
+    lease_cutoff = now - timedelta(seconds=JOB_LEASE_SECONDS)
+
+    job = (
+        db.query(ProcessingJob)
+        .filter(
+            or_(
+                and_(ProcessingJob.status == JOB_PENDING, ProcessingJob.available_at <= now),
+                and_(ProcessingJob.status == JOB_RUNNING, ProcessingJob.locked_at < lease_cutoff)
+            )
+        )
+        .order_by(ProcessingJob.available_at, ProcessingJob.id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if not job:
+        db.rollback()
+        return None
+
+    job.status = JOB_RUNNING
+    job.locked_by = worker_id
+    job.locked_at = now
+    job.attempts = (job.attempts or 0) + 1
+    db.commit()
+    db.refresh(job)
+    return job
+
+def renew_job_lease(db: Session, job_id: int, worker_id: str, claim_owner: str) -> bool:
+    """
+    Extends a running job's lease and the meeting claim it holds.
+    Returns False if the job is no longer held by this worker.
+    """
+    now = datetime.utcnow()
+    renewed = db.query(ProcessingJob).filter(
+        ProcessingJob.id == job_id,
+        ProcessingJob.status == JOB_RUNNING,
+        ProcessingJob.locked_by == worker_id
+    ).update({"locked_at": now}, synchronize_session=False)
+    db.query(MeetingClaim).filter(MeetingClaim.owner == claim_owner).update(
+        {"lease_expires_at": now + timedelta(seconds=CLAIM_LEASE_SECONDS)}, synchronize_session=False
+    )
+    db.commit()
+    return renewed > 0
+
+def mark_job_done(db: Session, job: ProcessingJob):
+    job.status = JOB_DONE
+    job.last_error = None
+    job.locked_by = None
+    job.locked_at = None
+    db.commit()
+
+def mark_job_failed(db: Session, job: ProcessingJob, error: str):
+    """Schedules a retry with linear backoff, or gives up once attempts are exhausted."""
+    job.last_error = error
+    job.locked_by = None
+    job.locked_at = None
+    if job.attempts >= JOB_MAX_ATTEMPTS:
+        job.status = JOB_FAILED
+        print(f"[❌ Job failed] Job {job.id} for meeting {job.meeting_id} gave up after {job.attempts} attempts.")
+    else:
+        job.status = JOB_PENDING
+        job.available_at = datetime.utcnow() + timedelta(seconds=JOB_RETRY_BACKOFF_SECONDS * job.attempts)
+        print(f"[🔁 Job retry] Job {job.id} for meeting {job.meeting_id} will retry (attempt {job.attempts}/{JOB_MAX_ATTEMPTS}).")
+    db.commit()
+
+def claim_meeting(db: Session, meeting_id: str, owner: str) -> bool:
+    """
+    Atomically claims a meeting for processing across all replicas and workers.
+    A single INSERT ... ON CONFLICT either creates the claim, takes over an expired one,
+    or renews one already held by the same owner; otherwise nothing is returned.
+    """
+    now = datetime.utcnow()
+    lease_expires_at = now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+    stmt = (
+        pg_insert(MeetingClaim)
+        .values(meeting_id=meeting_id, owner=owner, claimed_at=now, lease_expires_at=lease_expires_at)
+        .on_conflict_do_update(
+            index_elements=[MeetingClaim.meeting_id],
+            set_={"owner": owner, "claimed_at": now, "lease_expires_at": lease_expires_at},
+            where=or_(MeetingClaim.lease_expires_at < now, MeetingClaim.owner == owner)
+        )
+        .returning(MeetingClaim.owner)
+    )
+    row = db.execute(stmt).first()
+    db.commit()
+    return row is not None
+
+def release_meeting(db: Session, meeting_id: str, owner: str):
+    db.query(MeetingClaim).filter(
+        MeetingClaim.meeting_id == meeting_id,
+        MeetingClaim.owner == owner
+    ).delete(synchronize_session=False)
+    db.commit()
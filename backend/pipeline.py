@@ -0,0 +1,227 @@
+# backend/pipeline.py
+import os, json, hashlib
+from datetime import datetime
+from sqlalchemy.orm import Session
+from azure.storage.blob import BlobServiceClient
+
+from models import MeetingProcessingLog, MeetingLog, MeetingPipelineState, ScheduledMeeting
+from backend.jobs import claim_meeting, release_meeting
+
+from common.blob_storage import stream_url_to_blob, get_blob_sas_url
+from common.transcriber import transcribe_audio, transcribe_from_blob_url, new_audio_spool
+from common.transcript_cache import get_cached_transcript, store_transcript
+from common.summarizer import summarize_transcript, analyze_transcript, format_fused_summary
+from common.emailer import send_summary_emails
+from common.concurrency import run_blocking
+
+P2_STORAGE_CONN_STR = os.getenv("P2_STORAGE_CONNECTION_STRING")
+
+def load_participants(db: Session, meeting_id: str):
+    """Returns (participant emails, created_by_email, form host email) recorded when the meeting was scheduled."""
+    scheduled = db.query(
+        ScheduledMeeting.participants, ScheduledMeeting.created_by_email, ScheduledMeeting.host_email
+    ).filter(ScheduledMeeting.meeting_id == meeting_id).first()
+    if not scheduled:
+        return [], "unknown", None
+    return (
+        json.loads(scheduled.participants) if scheduled.participants else [],
+        scheduled.created_by_email or "unknown",
+        scheduled.host_email
+    )
+
+# Pipeline stages in order. Each completed stage is checkpointed in MeetingPipelineState
+# together with its artifact, so a retry resumes after the last finished stage.
+# Download and upload happen in one streaming pass and are recorded together as "uploaded".
+STAGE_PENDING = "pending"
+STAGE_UPLOADED = "uploaded"
+STAGE_TRANSCRIBED = "transcribed"
+STAGE_SUMMARIZED = "summarized"
+STAGE_EMAILED = "emailed"
+STAGE_PHASE2_TRIGGERED = "phase2_triggered"
+STAGES = [STAGE_PENDING, STAGE_UPLOADED, STAGE_TRANSCRIBED, STAGE_SUMMARIZED, STAGE_EMAILED, STAGE_PHASE2_TRIGGERED]
+
+def _reached(state: MeetingPipelineState, stage: str) -> bool:
+    return STAGES.index(state.stage) >= STAGES.index(stage)
+
+def _advance(db: Session, state: MeetingPipelineState, stage: str, **artifacts):
+    for field, value in artifacts.items():
+        setattr(state, field, value)
+    state.stage = stage
+    db.commit()
+    # Reload now, on the blocking pool, so reading state afterwards never lazy-loads on the event loop.
+    db.refresh(state)
+    print(f"[📌 Checkpoint] Meeting {state.meeting_id} reached '{stage}'")
+
+# Failure messages the transcriber and summarizer return instead of raising. Older checkpoints
+# may hold them as if they were results; those stages are redone rather than emailed.
+FAILED_TRANSCRIPT_PREFIX = "Transcription failed"
+FAILED_SUMMARIES = ("Summary generation failed.", "Summary could not be generated because the transcription failed.")
+
+def _discard_failed_stages(db: Session, state: MeetingPipelineState):
+    if _reached(state, STAGE_EMAILED):
+        return
+    if _reached(state, STAGE_TRANSCRIBED) and (state.transcript or "").startswith(FAILED_TRANSCRIPT_PREFIX):
+        _advance(db, state, STAGE_UPLOADED, transcript=None, summary=None, fused_analysis=None)
+    elif _reached(state, STAGE_SUMMARIZED) and state.summary in FAILED_SUMMARIES:
+        _advance(db, state, STAGE_TRANSCRIBED, summary=None, fused_analysis=None)
+
+def _load_state(db: Session, meeting_id: str):
+    """Returns (state, already_processed) for the meeting."""
+    state = db.query(MeetingPipelineState).filter_by(meeting_id=meeting_id).first()
+    if state:
+        return state, state.stage == STAGE_PHASE2_TRIGGERED
+    # Processed before checkpoints existed.
+    legacy = db.query(MeetingProcessingLog).filter_by(meeting_id=meeting_id).first()
+    return None, legacy is not None
+
+def _create_state(db: Session, meeting_id: str) -> MeetingPipelineState:
+    state = MeetingPipelineState(meeting_id=meeting_id, stage=STAGE_PENDING)
+    db.add(state)
+    db.commit()
+    db.refresh(state)
+    return state
+
+def _release_claim(db: Session, meeting_id: str, owner: str):
+    db.rollback()
+    release_meeting(db, meeting_id, owner)
+
+def _write_meeting_log(db: Session, state: MeetingPipelineState, recording: dict, host_email: str, created_by_email: str):
+    if db.query(MeetingProcessingLog).filter_by(meeting_id=state.meeting_id).first():
+        return
+    db.merge(MeetingLog(
+        meeting_id=state.meeting_id, host_email=host_email, summary=state.summary,
+        transcript=state.transcript, recipients=state.recipients, fused_analysis=state.fused_analysis,
+        meeting_time=datetime.fromisoformat(recording["start_time"].replace("Z", "+00:00")),
+        created_by_email=created_by_email, recording_full_url=get_blob_sas_url(state.audio_blob_path)
+    ))
+    db.add(MeetingProcessingLog(meeting_id=state.meeting_id))
+    db.commit()
+    print(f"[✅ Phase 1] DB records for {state.meeting_id} committed.")
+
+def _trigger_phase2(meeting_id: str, transcript: str):
+    blob_service_client = BlobServiceClient.from_connection_string(P2_STORAGE_CONN_STR)
+    blob_path = f"{meeting_id}/transcript.txt"
+    blob_client = blob_service_client.get_blob_client(container="raw-transcripts-phase2", blob=blob_path)
+    blob_client.upload_blob(transcript.encode('utf-8'), overwrite=True)
+    print(f"[✅ Phase 2 Trigger] Uploaded transcript to '{blob_path}' to start intelligence processing.")
+
+async def process_recording_completed(db: Session, payload: dict, owner: str) -> dict:
+    """
+    Claims the meeting and runs the phase 1 pipeline for a recording.completed event.
+    Zoom often delivers the same event more than once; only the holder of the claim does the work.
+    """
+    recording = payload.get("payload", {}).get("object", {})
+    meeting_id = str(recording.get("id"))
+
+    if not await run_blocking(claim_meeting, db, meeting_id, owner):
+        print(f"[🛑 Claimed elsewhere] Meeting {meeting_id} is already being processed. Skipping.")
+        return {"status": "duplicate skipped"}
+
+    try:
+        return await _run_pipeline(db, payload, recording, meeting_id)
+    finally:
+        await run_blocking(_release_claim, db, meeting_id, owner)
+
+async def _run_pipeline(db: Session, payload: dict, recording: dict, meeting_id: str) -> dict:
+    """
+    Runs the full phase 1 pipeline:
+    download -> blob upload -> transcribe -> summarize -> email -> DB -> phase 2 trigger.
+    Stages that already completed on an earlier attempt are skipped.
+    Every blocking call (DB, Whisper, GPT, Brevo) runs on the bounded blocking pool, so one
+    worker event loop can drive several meetings at once.
+    Raises on failure so the job queue can retry it.
+    """
+    state, already_processed = await run_blocking(_load_state, db, meeting_id)
+    if already_processed:
+        print(f"[🛑 Already processed] Skipping meeting {meeting_id}")
+        return {"status": "duplicate skipped"}
+
+    audio_file = next((f for f in recording.get("recording_files", []) if f["file_type"] == "M4A"), None)
+    if not audio_file:
+        print(f"[⚠️ No M4A audio file found] Skipping meeting {meeting_id}")
+        return {"status": "no audio file"}
+
+    if not state:
+        state = await run_blocking(_create_state, db, meeting_id)
+    else:
+        await run_blocking(_discard_failed_stages, db, state)
+        print(f"[⏩ Resuming] Meeting {meeting_id} from stage '{state.stage}'")
+
+    download_url = audio_file["download_url"]
+    filename = f"audio_{audio_file['id']}.m4a"
+    download_token = payload.get("download_token")
+    full_url = f"{download_url}?access_token={download_token}"
+
+    audio_spool = None
+    try:
+        if not _reached(state, STAGE_UPLOADED):
+            # Stream the recording from Zoom straight into staged blob blocks, teeing the bytes into a
+            # bounded spool so Whisper reads the local copy instead of downloading the blob again.
+            # The audio is hashed on the way through, so the transcript cache key is known without re-reading it.
+            audio_spool = new_audio_spool()
+            audio_hash = hashlib.sha256()
+            await stream_url_to_blob(meeting_id, full_url, filename, sink=audio_spool, hasher=audio_hash)
+            await run_blocking(
+                _advance, db, state, STAGE_UPLOADED,
+                audio_blob_path=f"{meeting_id}/{filename}", audio_sha256=audio_hash.hexdigest()
+            )
+
+        if not _reached(state, STAGE_TRANSCRIBED):
+            # Re-delivered or reprocessed recordings with identical audio reuse the earlier transcript.
+            transcript = await run_blocking(get_cached_transcript, db, state.audio_sha256)
+            if transcript is None:
+                # raise_errors: a failed Whisper call must fail the job so the queue retries it,
+                # never be checkpointed, cached or emailed as if it were the transcript.
+                if audio_spool is not None:
+                    transcript = await run_blocking(transcribe_audio, audio_spool, filename, raise_errors=True)
+                else:
+                    # Resumed run: the local copy is gone, so read the recording back from blob storage.
+                    transcript = await run_blocking(
+                        transcribe_from_blob_url, get_blob_sas_url(state.audio_blob_path), raise_errors=True
+                    )
+                await run_blocking(store_transcript, db, state.audio_sha256, transcript)
+            await run_blocking(_advance, db, state, STAGE_TRANSCRIBED, transcript=transcript)
+    finally:
+        if audio_spool is not None:
+            audio_spool.close()
+
+    recipients, created_by_email, form_host_email = await run_blocking(load_participants, db, meeting_id)
+
+    effective_host_email = form_host_email or recording.get("host_email")
+    if not recipients:
+        recipients = [effective_host_email] if effective_host_email else []
+    if effective_host_email and effective_host_email not in recipients:
+        recipients.append(effective_host_email)
+
+    if not _reached(state, STAGE_SUMMARIZED):
+        # In fused mode one call yields both the summary and the classification phase 2 needs;
+        # analyze_transcript returns None when that is off or not possible, and we summarize on our own.
+        analysis = await run_blocking(analyze_transcript, state.transcript, recipients)
+        if analysis is not None:
+            summary = format_fused_summary(analysis)
+        else:
+            summary = await run_blocking(summarize_transcript, state.transcript, raise_errors=True)
+        await run_blocking(_advance, db, state, STAGE_SUMMARIZED, summary=summary, fused_analysis=analysis)
+
+    if not _reached(state, STAGE_EMAILED):
+        results = await run_blocking(
+            send_summary_emails,
+            recipients,
+            subject=f"📝 Summary for Zoom Meeting {meeting_id}",
+            summary_text=state.summary,
+            transcript_text=state.transcript
+        )
+        failed = [email for email, sent in results.items() if not sent]
+        if failed:
+            print(f"[⚠️ Email] Summary could not be delivered to: {', '.join(failed)}")
+        await run_blocking(_advance, db, state, STAGE_EMAILED, recipients=json.dumps(recipients))
+
+    await run_blocking(_write_meeting_log, db, state, recording, effective_host_email, created_by_email)
+
+    if P2_STORAGE_CONN_STR:
+        await run_blocking(_trigger_phase2, meeting_id, state.transcript)
+    else:
+        print("[⚠️ Phase 2 Trigger] P2_STORAGE_CONNECTION_STRING not set. Skipping trigger.")
+    await run_blocking(_advance, db, state, STAGE_PHASE2_TRIGGERED)
+
+    return {"status": "processed", "meeting_id": meeting_id}
@@ -0,0 +1,104 @@
+# backend/worker.py
+# Background worker pool for queued webhook jobs. Run with: python -m backend.worker
+import os, time, socket, asyncio, traceback
+import multiprocessing
+
+from frontend.db import SessionLocal, engine
+from backend.jobs import claim_next_job, mark_job_done, mark_job_failed, renew_job_lease, JOB_HEARTBEAT_SECONDS
+from backend.pipeline import process_recording_completed
+from common.concurrency import run_blocking
+
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "2"))
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "2"))
+# Jobs each worker process runs concurrently on its event loop.
+WORKER_JOBS_PER_PROCESS = int(os.getenv("WORKER_JOBS_PER_PROCESS", "4"))
+
+JOB_HANDLERS = {
+    "recording.completed": process_recording_completed,
+}
+
+async def heartbeat(job_id: int, worker_id: str, claim_owner: str):
+    """Renews the job lease and meeting claim until cancelled. Uses its own session; the job's is busy."""
+    while True:
+        await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+        db = SessionLocal()
+        try:
+            if not await run_blocking(renew_job_lease, db, job_id, worker_id, claim_owner):
+                print(f"[⚠️ Worker] Job {job_id} is no longer leased to {worker_id}; another worker may pick it up.")
+        except Exception as e:
+            print(f"[⚠️ Worker] Could not renew the lease for job {job_id}: {e}")
+        finally:
+            await run_blocking(db.close)
+
+async def run_job(db, job):
+    job_id, event_type, meeting_id, payload = job.id, job.event_type, job.meeting_id, job.payload
+    handler = JOB_HANDLERS.get(event_type)
+    if not handler:
+        print(f"[⚠️ Worker] No handler for event '{event_type}'. Dropping job {job_id}.")
+        await run_blocking(mark_job_done, db, job)
+        return
+
+    print(f"[⚙️ Worker] Processing job {job_id} ({event_type}) for meeting {meeting_id}")
+    # The job id is the claim owner, so a retry of this same job can renew its own claim.
+    owner = f"job-{job_id}"
+    lease = asyncio.create_task(heartbeat(job_id, job.locked_by, owner))
+    try:
+        result = await handler(db, payload, owner=owner)
+        await run_blocking(mark_job_done, db, job)
+        print(f"[✅ Worker] Job {job_id} finished: {result}")
+    except Exception as e:
+        print(f"[❌ Worker] Job {job_id} failed: {e}")
+        traceback.print_exc()
+        await run_blocking(db.rollback)
+        await run_blocking(mark_job_failed, db, job, str(e))
+    finally:
+        # A renewal after the job finished only touches rows that no longer match.
+        lease.cancel()
+
+async def worker_loop(worker_id: str):
+    print(f"[🚀 Worker] {worker_id} started.")
+    while True:
+        db = SessionLocal()
+        try:
+            job = await run_blocking(claim_next_job, db, worker_id)
+            if job:
+                await run_job(db, job)
+        except Exception as e:
+            print(f"[❌ Worker] {worker_id} loop error: {e}")
+            traceback.print_exc()
+            job = None
+        finally:
+            await run_blocking(db.close)
+
+        if not job:
+            await asyncio.sleep(WORKER_POLL_INTERVAL)
+
+async def worker_process_main(process_id: str):
+    # Each slot claims and runs its own jobs; blocking steps are offloaded, so the slots
+    # share one event loop without waiting on each other.
+    await asyncio.gather(*(worker_loop(f"{process_id}-{slot}") for slot in range(WORKER_JOBS_PER_PROCESS)))
+
+def run_worker(index: int):
+    # Never share pooled connections inherited from the parent across a fork.
+    engine.dispose()
+    process_id = f"{socket.gethostname()}-{os.getpid()}-{index}"
+    asyncio.run(worker_process_main(process_id))
+
+def main():
+    processes = []
+    for i in range(WORKER_CONCURRENCY):
+        p = multiprocessing.Process(target=run_worker, args=(i,), daemon=True)
+        p.start()
+        processes.append(p)
+
+    # Supervise the pool: restart any worker process that dies.
+    while True:
+        for i, p in enumerate(processes):
+            if not p.is_alive():
+                print(f"[⚠️ Worker] Process {i} exited with code {p.exitcode}. Restarting.")
+                processes[i] = multiprocessing.Process(target=run_worker, args=(i,), daemon=True)
+                processes[i].start()
+        time.sleep(5)
+
+if __name__ == "__main__":
+    main()
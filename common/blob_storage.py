@@ -1,6 +1,10 @@
 #common\blob_storage.py
 import os
-from azure.storage.blob import BlobServiceClient, generate_blob_sas, BlobSasPermissions
+import base64
+import asyncio
+from common.http_client import get_async_client
+from azure.storage.blob import BlobServiceClient, BlobBlock, generate_blob_sas, BlobSasPermissions
+from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
@@ -10,32 +14,100 @@ AZURE_BLOB_CONN_STRING = os.getenv("AZURE_BLOB_CONNECTION_STRING")
 AZURE_BLOB_ACCOUNT_KEY = os.getenv("AZURE_BLOB_ACCOUNT_KEY")  # ✅ explicitly required
 AZURE_BLOB_CONTAINER = os.getenv("AZURE_BLOB_CONTAINER", "meetings")
 
+# Streaming ingest: size of each staged block and how many may be uploading at once.
+# Peak memory per stream is roughly STREAM_BLOCK_SIZE * (STREAM_MAX_IN_FLIGHT + 1).
+STREAM_BLOCK_SIZE = int(os.getenv("BLOB_STREAM_BLOCK_SIZE", str(8 * 1024 * 1024)))
+STREAM_MAX_IN_FLIGHT = int(os.getenv("BLOB_STREAM_MAX_IN_FLIGHT", "4"))
+
 blob_service = BlobServiceClient.from_connection_string(AZURE_BLOB_CONN_STRING)
 container_client = blob_service.get_container_client(AZURE_BLOB_CONTAINER)
 
-def upload_file_to_blob(meeting_id, local_file_path, blob_filename=None):
-    blob_filename = blob_filename or os.path.basename(local_file_path)
+# The aio client is bound to the event loop it was created on, so keep one per loop
+# and reuse it for every upload instead of opening a new connection pool each time.
+_async_containers = {}
+
+def get_async_container_client():
+    loop = asyncio.get_running_loop()
+    client = _async_containers.get(loop)
+    if client is None:
+        service = AsyncBlobServiceClient.from_connection_string(AZURE_BLOB_CONN_STRING)
+        client = service.get_container_client(AZURE_BLOB_CONTAINER)
+        _async_containers[loop] = client
+    return client
+
+def get_blob_sas_url(blob_path, hours=1):
+    # ✅ Generate SAS URL with explicit account_key
+    sas_token = generate_blob_sas(
+        account_name=blob_service.account_name,
+        container_name=AZURE_BLOB_CONTAINER,
+        blob_name=blob_path,
+        account_key=AZURE_BLOB_ACCOUNT_KEY,
+        permission=BlobSasPermissions(read=True),
+        expiry=datetime.utcnow() + timedelta(hours=hours)
+    )
+    return f"{container_client.url}/{blob_path}?{sas_token}"
+
+async def stream_url_to_blob(meeting_id, source_url, blob_filename, timeout=90.0, sink=None, hasher=None):
+    """
+    Downloads source_url and uploads it to blob storage in the same pass, without a temp file.
+    Incoming bytes are cut into STREAM_BLOCK_SIZE blocks which are staged concurrently
+    (at most STREAM_MAX_IN_FLIGHT at a time) and committed once the download finishes.
+    If sink is given, every downloaded chunk is also written to it so callers can keep a
+    local copy without fetching the blob again. If hasher is given (e.g. hashlib.sha256()),
+    it is updated with every chunk, so the content digest is ready when the upload finishes.
+    Returns a SAS URL for the new blob.
+    """
     blob_path = f"{meeting_id}/{blob_filename}"
+    blob_client = get_async_container_client().get_blob_client(blob_path)
+    in_flight = asyncio.Semaphore(STREAM_MAX_IN_FLIGHT)
+    block_ids = []
+    tasks = []
 
+    async def stage(block_id, data):
+        try:
+            await blob_client.stage_block(block_id=block_id, data=data)
+        finally:
+            in_flight.release()
+
+    async def submit(data):
+        # Waiting here applies backpressure to the download when uploads fall behind.
+        await in_flight.acquire()
+        for task in tasks:
+            if task.done() and task.exception():
+                in_flight.release()
+                raise task.exception()
+        block_id = base64.b64encode(f"{len(block_ids):08d}".encode()).decode()
+        block_ids.append(block_id)
+        tasks.append(asyncio.create_task(stage(block_id, data)))
+
+    total_bytes = 0
     try:
-        with open(local_file_path, "rb") as data:
-            container_client.upload_blob(name=blob_path, data=data, overwrite=True)
-            print(f"[⬆️ Uploaded] {blob_filename} to {blob_path}")
-
-        # ✅ Generate SAS URL with explicit account_key
-        sas_token = generate_blob_sas(
-            account_name=blob_service.account_name,
-            container_name=AZURE_BLOB_CONTAINER,
-            blob_name=blob_path,
-            account_key=AZURE_BLOB_ACCOUNT_KEY,
-            permission=BlobSasPermissions(read=True),
-            expiry=datetime.utcnow() + timedelta(hours=1)
-        )
-
-        sas_url = f"{container_client.url}/{blob_path}?{sas_token}"
-        print(f"[🔗 SAS URL] {sas_url}")
-        return sas_url
+        buffer = bytearray()
+        async with get_async_client().stream("GET", source_url, timeout=timeout) as r:
+            r.raise_for_status()
+            async for chunk in r.aiter_bytes():
+                if sink is not None:
+                    sink.write(chunk)
+                if hasher is not None:
+                    hasher.update(chunk)
+                buffer.extend(chunk)
+                total_bytes += len(chunk)
+                while len(buffer) >= STREAM_BLOCK_SIZE:
+                    await submit(bytes(buffer[:STREAM_BLOCK_SIZE]))
+                    del buffer[:STREAM_BLOCK_SIZE]
+        if buffer:
+            await submit(bytes(buffer))
+        await asyncio.gather(*tasks)
 
+        await blob_client.commit_block_list([BlobBlock(block_id=b) for b in block_ids])
+        print(f"[⬆️ Streamed] {total_bytes} bytes in {len(block_ids)} blocks to {blob_path}")
     except Exception as e:
-        print(f"[❌ Upload failed] {e}")
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        print(f"[❌ Streaming upload failed] {e}")
         raise
+
+    sas_url = get_blob_sas_url(blob_path)
+    print(f"[🔗 SAS URL] {sas_url}")
+    return sas_url
@@ -0,0 +1,16 @@
+# common/concurrency.py
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+# Bounded pool for blocking work (sync DB sessions, OpenAI/Brevo clients, audio decoding)
+# called from async code, so the event loop never waits on it directly.
+BLOCKING_POOL_SIZE = int(os.getenv("BLOCKING_POOL_SIZE", "16"))
+
+_blocking_executor = ThreadPoolExecutor(max_workers=BLOCKING_POOL_SIZE, thread_name_prefix="blocking")
+
+async def run_blocking(func, *args, **kwargs):
+    """Runs func(*args, **kwargs) on the bounded blocking pool and awaits the result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_blocking_executor, functools.partial(func, *args, **kwargs))
@@ -1,6 +1,8 @@
 import os
 import json
 import requests
+from common import http_client
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,13 +10,22 @@ BREVO_API_KEY = os.getenv("BREVO_API_KEY")
 FROM_NAME = os.getenv("FROM_NAME", "Universal Meeting Assistant")
 FROM_EMAIL = os.getenv("FROM_EMAIL", "no-reply@yourdomain.com")
 
+BREVO_SEND_URL = "https://api.brevo.com/v3/smtp/email"
+# Brevo accepts up to 1000 message versions in a single send request.
+BREVO_MAX_VERSIONS = 1000
+EMAIL_FALLBACK_CONCURRENCY = int(os.getenv("EMAIL_FALLBACK_CONCURRENCY", "8"))
 
+BREVO_HEADERS = {
+    "Accept": "application/json",
+    "Api-Key": BREVO_API_KEY,
+    "Content-Type": "application/json"
+}
 
+def _post_email(data):
+    return http_client.post(BREVO_SEND_URL, headers=BREVO_HEADERS, data=json.dumps(data))
 
-def send_meeting_invite(to_email, to_name, meeting):
-    subject = f"📅 Zoom Meeting Scheduled: {meeting['meeting_id']} on {meeting['start_time_gst']}"
-
-    html_content = f"""
+def _build_invite_html(to_name, meeting):
+    return f"""
     <html>
       <body style="font-family: Arial, sans-serif; background-color: #f9f9f9; color: #333;">
         <div style="max-width: 600px; margin: auto; background: #ffffff; padding: 20px; border-radius: 8px; box-shadow: 0 0 10px rgba(0,0,0,0.05);">
@@ -40,37 +51,7 @@ def send_meeting_invite(to_email, to_name, meeting):
     </html>
     """
 
-    data = {
-        "sender": {
-            "name": FROM_NAME,
-            "email": FROM_EMAIL
-        },
-        "to": [{"email": to_email, "name": to_name or "Participant"}],
-        "subject": subject,
-        "htmlContent": html_content
-    }
-
-    headers = {
-        "Accept": "application/json",
-        "Api-Key": BREVO_API_KEY,
-        "Content-Type": "application/json"
-    }
-
-    response = requests.post(
-        "https://api.brevo.com/v3/smtp/email",
-        headers=headers,
-        data=json.dumps(data)
-    )
-
-    if response.status_code != 201:
-        print(f"[❌ Email Failed] {response.status_code} - {response.text}")
-    else:
-        print(f"[✅ Email Sent] To: {to_email}")
-        print("📨 Brevo Response:", response.text)
-
-
-
-def send_summary_email(to_email, to_name, subject, summary_text, transcript_text=None, join_url=None):
+def _build_summary_html(to_name, summary_text, transcript_text=None, join_url=None):
     html_content = f"""
     <html>
       <body style="font-family: Arial, sans-serif; background-color: #f9f9f9; color: #333;">
@@ -101,33 +82,78 @@ def send_summary_email(to_email, to_name, subject, summary_text, transcript_text
       </body>
     </html>
     """
+    return html_content
 
+def _send_one(to_email, to_name, subject, html_content):
     data = {
-        "sender": {
-            "name": FROM_NAME,
-            "email": FROM_EMAIL
-        },
-        "to": [{
-            "name": to_name,
-            "email": to_email
-        }],
+        "sender": {"name": FROM_NAME, "email": FROM_EMAIL},
+        "to": [{"email": to_email, "name": to_name}],
         "subject": subject,
         "htmlContent": html_content
     }
-
-    headers = {
-        "Accept": "application/json",
-        "Api-Key": BREVO_API_KEY,
-        "Content-Type": "application/json"
-    }
-
-    response = requests.post(
-        "https://api.brevo.com/v3/smtp/email",
-        headers=headers,
-        data=json.dumps(data)
-    )
+    try:
+        response = _post_email(data)
+    except requests.exceptions.RequestException as e:
+        print(f"[❌ Email error] To: {to_email}: {e}")
+        return False
 
     if response.status_code == 201:
         print(f"[✅ Email sent] To: {to_email}")
-    else:
-        print(f"[❌ Email error] {response.status_code}: {response.text}")
+        return True
+    print(f"[❌ Email error] {response.status_code}: {response.text}")
+    return False
+
+def send_bulk_email(recipients, subject, html_content, to_name="Participant"):
+    """
+    Sends the same email to every recipient using Brevo message versions, so each person
+    gets an individual copy but the whole list goes out in one API call.
+    If a batch is rejected (e.g. one malformed address), its recipients are retried
+    individually and concurrently so one bad address does not block the rest.
+    Returns {email: True/False}.
+    """
+    recipients = list(dict.fromkeys(r for r in recipients if r))
+    results = {}
+
+    for i in range(0, len(recipients), BREVO_MAX_VERSIONS):
+        batch = recipients[i:i + BREVO_MAX_VERSIONS]
+        data = {
+            "sender": {"name": FROM_NAME, "email": FROM_EMAIL},
+            "subject": subject,
+            "htmlContent": html_content,
+            "messageVersions": [{"to": [{"email": email, "name": to_name}]} for email in batch]
+        }
+        try:
+            response = _post_email(data)
+            ok = response.status_code == 201
+            if not ok:
+                print(f"[❌ Bulk email error] {response.status_code}: {response.text}")
+        except requests.exceptions.RequestException as e:
+            print(f"[❌ Bulk email error] {e}")
+            ok = False
+
+        if ok:
+            print(f"[✅ Bulk email sent] {len(batch)} recipients")
+            results.update({email: True for email in batch})
+            continue
+
+        print(f"[🔁 Bulk email fallback] Sending {len(batch)} emails individually")
+        with ThreadPoolExecutor(max_workers=EMAIL_FALLBACK_CONCURRENCY) as pool:
+            sent = pool.map(lambda email: _send_one(email, to_name, subject, html_content), batch)
+            results.update(zip(batch, sent))
+
+    return results
+
+def send_meeting_invites(recipients, meeting, to_name=""):
+    subject = f"📅 Zoom Meeting Scheduled: {meeting['meeting_id']} on {meeting['start_time_gst']}"
+    return send_bulk_email(recipients, subject, _build_invite_html(to_name, meeting), to_name=to_name or "Participant")
+
+def send_summary_emails(recipients, subject, summary_text, transcript_text=None, join_url=None, to_name="Participant"):
+    html_content = _build_summary_html(to_name, summary_text, transcript_text, join_url)
+    return send_bulk_email(recipients, subject, html_content, to_name=to_name)
+
+def send_meeting_invite(to_email, to_name, meeting):
+    subject = f"📅 Zoom Meeting Scheduled: {meeting['meeting_id']} on {meeting['start_time_gst']}"
+    return _send_one(to_email, to_name or "Participant", subject, _build_invite_html(to_name, meeting))
+
+def send_summary_email(to_email, to_name, subject, summary_text, transcript_text=None, join_url=None):
+    return _send_one(to_email, to_name, subject, _build_summary_html(to_name, summary_text, transcript_text, join_url))
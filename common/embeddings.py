@@ -0,0 +1,26 @@
+# common/embeddings.py
+import os
+from openai import OpenAI
+from dotenv import load_dotenv
+
+from common.llm_cache import cached_call
+from common.rate_limiter import call_with_rate_limit
+from common.tokens import count_tokens
+
+load_dotenv()
+# max_retries=0: 429s are retried by common.rate_limiter, which counts them against the shared quota.
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+# Must be the model the meeting brain indexes passages with (see intelligence_processor/brain/vectorizer.py),
+# otherwise query and passage vectors are not comparable.
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+
+def get_embedding(text: str) -> list[float]:
+    """Embeds a search query. Repeated queries are served from the LLM cache."""
+    def call():
+        response = call_with_rate_limit(
+            EMBEDDING_MODEL, count_tokens(text), lambda: client.embeddings.create(input=text, model=EMBEDDING_MODEL)
+        )
+        return response.data[0].embedding
+
+    return cached_call(EMBEDDING_MODEL, "embedding", text, {}, call)
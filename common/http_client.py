@@ -0,0 +1,113 @@
+# common/http_client.py
+# Shared outbound HTTP layer for Zoom, Brevo, blob SAS fetches and calls between our own services.
+# Every process keeps one pooled keep-alive client (sync, plus async for streaming downloads)
+# instead of opening a new TCP+TLS connection per call, and all callers get the same default
+# timeouts and retry policy.
+import os
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))
+
+DEFAULT_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+# Calls from the web app to our own API's mutating endpoints wait on Zoom (with its own retries)
+# before answering, so they get a longer read timeout, and they pass retries=0: a timed-out or
+# failed attempt may already have created or cancelled the Zoom meeting.
+INTERNAL_API_TIMEOUT = (HTTP_CONNECT_TIMEOUT, float(os.getenv("INTERNAL_API_READ_TIMEOUT", "180")))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# A 429 means the request was not processed, so it is safe to retry for any method.
+# Server errors and connection failures are only retried when repeating the call is harmless.
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+_lock = threading.Lock()
+_session = None
+_session_pid = None
+_async_clients = {}
+
+def get_session() -> requests.Session:
+    """Returns this process's pooled session (recreated after a fork)."""
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        with _lock:
+            if _session is None or _session_pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=10, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session, _session_pid = session, os.getpid()
+    return _session
+
+def get_async_client() -> httpx.AsyncClient:
+    """Returns the pooled async client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=HTTP_POOL_MAXSIZE, max_keepalive_connections=HTTP_POOL_MAXSIZE)
+        )
+        _async_clients[loop] = client
+    return client
+
+def _should_retry(method: str, status_code: int) -> bool:
+    if status_code == 429:
+        return True
+    return status_code in RETRY_STATUSES and method.upper() in IDEMPOTENT_METHODS
+
+def _retry_delay(attempt: int, headers=None) -> float:
+    retry_after = (headers or {}).get("Retry-After")
+    if retry_after:
+        try:
+            return min(float(retry_after), HTTP_BACKOFF_MAX)
+        except ValueError:
+            try:
+                wait = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                return min(max(wait, 0), HTTP_BACKOFF_MAX)
+            except (TypeError, ValueError):
+                pass
+    # Exponential backoff with full jitter so retrying clients do not stampede together.
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+def request(method: str, url: str, timeout=None, retries: int = HTTP_MAX_RETRIES, **kwargs) -> requests.Response:
+    session = get_session()
+    for attempt in range(retries + 1):
+        try:
+            response = session.request(method, url, timeout=timeout or DEFAULT_TIMEOUT, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt < retries and method.upper() in IDEMPOTENT_METHODS:
+                delay = _retry_delay(attempt)
+                print(f"[🔁 HTTP retry] {method} {url.split('?')[0]} failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            raise
+
+        if attempt < retries and _should_retry(method, response.status_code):
+            delay = _retry_delay(attempt, response.headers)
+            print(f"[🔁 HTTP retry] {method} {url.split('?')[0]} returned {response.status_code}; retrying in {delay:.1f}s")
+            response.close()
+            time.sleep(delay)
+            continue
+        return response
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+def delete(url, **kwargs):
+    return request("DELETE", url, **kwargs)
@@ -0,0 +1,157 @@
+# common/llm_cache.py
+# Two-tier cache for deterministic LLM calls: an in-process LRU in front of the shared
+# llm_cache_entries table. Keys cover the model, the prompt template version, the exact input
+# and the call parameters, so changing any of them is a miss rather than a stale answer.
+import os
+import json
+import base64
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+
+# Set LLM_CACHE_BYPASS=true to skip both tiers and always call the model.
+LLM_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "false").lower() == "true"
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512"))
+# Upper bound on rows kept in Postgres; the least recently used rows are pruned past it.
+# Embeddings have their own cap so a large indexing run cannot evict cached summaries and classifications.
+LLM_CACHE_MAX_ROWS = int(os.getenv("LLM_CACHE_MAX_ROWS", "50000"))
+LLM_CACHE_MAX_EMBEDDING_ROWS = int(os.getenv("LLM_CACHE_MAX_EMBEDDING_ROWS", "100000"))
+LLM_CACHE_PRUNE_EVERY = int(os.getenv("LLM_CACHE_PRUNE_EVERY", "100"))
+EMBEDDING_TEMPLATE = "embedding"
+
+_lock = threading.Lock()
+_memory = OrderedDict()
+_writes_since_prune = {True: 0, False: 0} # keyed by "is an embedding"
+
+def make_key(model: str, template_version: str, input_data, params: dict) -> str:
+    raw = json.dumps(
+        {"model": model, "template": template_version, "input": input_data, "params": params},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _memory_get(key):
+    with _lock:
+        if key not in _memory:
+            return None
+        _memory.move_to_end(key)
+        return _memory[key]
+
+def _memory_put(key, value):
+    with _lock:
+        _memory[key] = value
+        _memory.move_to_end(key)
+        while len(_memory) > LLM_CACHE_MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+def _encode(template_version, value):
+    # Embeddings are stored as base64 float32 (~8 KB for 1536 dimensions instead of ~30 KB of JSON numbers).
+    if template_version == EMBEDDING_TEMPLATE and isinstance(value, list):
+        return {"f32": base64.b64encode(array("f", value).tobytes()).decode("ascii")}
+    return value
+
+def _decode(value):
+    if isinstance(value, dict) and set(value) == {"f32"}:
+        return array("f", base64.b64decode(value["f32"])).tolist()
+    return value
+
+def _db_get_many(keys) -> dict:
+    """Looks up all keys with one query and records the hits with one update."""
+    from sqlalchemy import update
+    from frontend.db import SessionLocal
+    from models import LLMCacheEntry
+
+    db = SessionLocal()
+    try:
+        rows = db.query(LLMCacheEntry.cache_key, LLMCacheEntry.response).filter(LLMCacheEntry.cache_key.in_(keys)).all()
+        if not rows:
+            return {}
+        found = {row.cache_key: _decode(row.response) for row in rows}
+        db.execute(update(LLMCacheEntry).where(LLMCacheEntry.cache_key.in_(list(found))).values(
+            hit_count=LLMCacheEntry.hit_count + 1, last_used_at=datetime.utcnow()
+        ))
+        db.commit()
+        return found
+    finally:
+        db.close()
+
+def _db_get(key):
+    return _db_get_many([key]).get(key)
+
+def _db_put_many(model, template_version, entries: dict):
+    """Inserts {key: value} in one statement, then prunes this kind of entry every LLM_CACHE_PRUNE_EVERY writes."""
+    from sqlalchemy import text
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    from frontend.db import SessionLocal
+    from models import LLMCacheEntry
+
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        db.execute(pg_insert(LLMCacheEntry).values([
+            dict(cache_key=key, model=model, template_version=template_version, response=_encode(template_version, value),
+                 hit_count=0, created_at=now, last_used_at=now)
+            for key, value in entries.items()
+        ]).on_conflict_do_nothing())
+        db.commit()
+
+        embedding = template_version == EMBEDDING_TEMPLATE
+        with _lock:
+            _writes_since_prune[embedding] += len(entries)
+            prune = _writes_since_prune[embedding] >= LLM_CACHE_PRUNE_EVERY
+            if prune:
+                _writes_since_prune[embedding] = 0
+        if prune:
+            kind = "=" if embedding else "<>"
+            pruned = db.execute(text(f"""
+                DELETE FROM llm_cache_entries WHERE cache_key IN (
+                    SELECT cache_key FROM llm_cache_entries WHERE template_version {kind} :embedding
+                    ORDER BY last_used_at DESC OFFSET :max_rows
+                )
+            """), {
+                "embedding": EMBEDDING_TEMPLATE,
+                "max_rows": LLM_CACHE_MAX_EMBEDDING_ROWS if embedding else LLM_CACHE_MAX_ROWS
+            }).rowcount
+            db.commit()
+            if pruned:
+                print(f"[🗃️ LLM cache] Pruned {pruned} least recently used {'embedding' if embedding else 'response'} entries")
+    finally:
+        db.close()
+
+def _db_put(key, model, template_version, value):
+    _db_put_many(model, template_version, {key: value})
+
+def cached_call(model: str, template_version: str, input_data, params: dict, compute):
+    """
+    Returns compute() for this (model, template version, input, params), serving it from the
+    in-process LRU or the shared table when possible. compute() must return a JSON-serializable
+    value and raise on failure; exceptions are never cached.
+    A failing cache tier is logged and skipped; it never fails the call itself.
+    """
+    if LLM_CACHE_BYPASS:
+        return compute()
+
+    key = make_key(model, template_version, input_data, params)
+    value = _memory_get(key)
+    if value is not None:
+        return value
+
+    try:
+        value = _db_get(key)
+    except Exception as e:
+        print(f"[⚠️ LLM cache] Lookup failed, calling the model: {e}")
+        value = None
+    if value is not None:
+        print(f"[🗃️ LLM cache] Hit for {model} ({key[:12]})")
+        _memory_put(key, value)
+        return value
+
+    value = compute()
+    _memory_put(key, value)
+    try:
+        _db_put(key, model, template_version, value)
+    except Exception as e:
+        print(f"[⚠️ LLM cache] Could not store entry: {e}")
+    return value
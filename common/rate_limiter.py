@@ -0,0 +1,171 @@
+# common/rate_limiter.py
+# Token-bucket rate limiting for OpenAI calls, per model/deployment. Each bucket tracks requests
+# (RPM) and estimated model tokens (TPM). Buckets live in the rate_limit_buckets table so every
+# worker process and replica draws from the same quota; callers wait for capacity instead of
+# failing, and a 429 pushes the whole bucket into an adaptive backoff.
+import os
+import json
+import time
+import random
+import threading
+from datetime import datetime, timedelta
+import openai
+
+# Quotas per model/deployment; "tpm": 0 means only requests are limited.
+# Override or extend with RATE_LIMITS='{"gpt-4": {"rpm": 200, "tpm": 40000}}'.
+DEFAULT_RATE_LIMITS = {
+    "gpt-4": {"rpm": 200, "tpm": 40000},
+    "whisper-1": {"rpm": 50, "tpm": 0},
+    "text-embedding-ada-002": {"rpm": 3000, "tpm": 1000000},
+}
+RATE_LIMITS = {**DEFAULT_RATE_LIMITS, **json.loads(os.getenv("RATE_LIMITS", "{}"))}
+# When false (or when the DB is unreachable) each process keeps its own buckets.
+RATE_LIMIT_SHARED = os.getenv("RATE_LIMIT_SHARED", "true").lower() == "true"
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "6"))
+# Longest single sleep before checking the bucket again.
+RATE_LIMIT_MAX_SLEEP_SECONDS = 5.0
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_MAX_SECONDS = 60.0
+# The OpenAI clients are built with max_retries=0, so connection errors, timeouts and 5xx
+# responses are retried here as well. They back off only the failing caller, with jitter,
+# and do not touch the shared bucket.
+TRANSIENT_ERRORS = (openai.APIConnectionError, openai.InternalServerError) # APITimeoutError is an APIConnectionError
+TRANSIENT_MAX_RETRIES = int(os.getenv("OPENAI_TRANSIENT_MAX_RETRIES", "3"))
+TRANSIENT_BACKOFF_BASE_SECONDS = 0.5
+TRANSIENT_BACKOFF_MAX_SECONDS = 8.0
+
+class _LocalBucket:
+    def __init__(self, limits: dict, now: datetime):
+        self.request_tokens = float(limits.get("rpm", 0))
+        self.token_tokens = float(limits.get("tpm", 0))
+        self.backoff_seconds = 0.0
+        self.backoff_until = None
+        self.updated_at = now
+
+_local_lock = threading.Lock()
+_local_buckets = {}
+
+def _take(bucket, limits: dict, cost: int, now: datetime) -> float:
+    """Refills the bucket, then spends one request and `cost` tokens and returns 0, or returns the seconds to wait."""
+    rpm, tpm = limits.get("rpm", 0), limits.get("tpm", 0)
+    elapsed = max((now - bucket.updated_at).total_seconds(), 0)
+    bucket.updated_at = now
+    if rpm:
+        bucket.request_tokens = min(rpm, bucket.request_tokens + elapsed * rpm / 60)
+    if tpm:
+        bucket.token_tokens = min(tpm, bucket.token_tokens + elapsed * tpm / 60)
+
+    if bucket.backoff_until and now < bucket.backoff_until:
+        return (bucket.backoff_until - now).total_seconds()
+
+    # A single call larger than the whole per-minute budget still runs once the bucket is full.
+    cost = min(cost, tpm) if tpm else 0
+    wait = 0.0
+    if rpm and bucket.request_tokens < 1:
+        wait = (1 - bucket.request_tokens) * 60 / rpm
+    if tpm and bucket.token_tokens < cost:
+        wait = max(wait, (cost - bucket.token_tokens) * 60 / tpm)
+    if wait:
+        return wait
+
+    if rpm:
+        bucket.request_tokens -= 1
+    if tpm:
+        bucket.token_tokens -= cost
+    # Calls are going through again, so ease off the backoff for the next 429.
+    bucket.backoff_seconds = bucket.backoff_seconds / 2 if bucket.backoff_seconds >= BACKOFF_BASE_SECONDS else 0.0
+    return 0.0
+
+def _penalize(bucket, retry_after, now: datetime):
+    bucket.backoff_seconds = min(max(bucket.backoff_seconds * 2, BACKOFF_BASE_SECONDS), BACKOFF_MAX_SECONDS)
+    until = now + timedelta(seconds=max(retry_after or 0, bucket.backoff_seconds))
+    if not bucket.backoff_until or until > bucket.backoff_until:
+        bucket.backoff_until = until
+    # Empty the request bucket so waiting callers resume one by one instead of all at once.
+    bucket.request_tokens = min(bucket.request_tokens, 0)
+
+def _apply_shared(name: str, limits: dict, fn):
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    from frontend.db import SessionLocal
+    from models import RateLimitBucket
+
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        db.execute(pg_insert(RateLimitBucket).values(
+            name=name, request_tokens=limits.get("rpm", 0), token_tokens=limits.get("tpm", 0),
+            backoff_seconds=0, updated_at=now
+        ).on_conflict_do_nothing())
+        # The row lock serializes updates to the bucket across processes; it is held only for this update.
+        bucket = db.query(RateLimitBucket).filter_by(name=name).with_for_update().one()
+        result = fn(bucket, now)
+        db.commit()
+        return result
+    finally:
+        db.close()
+
+def _apply(name: str, limits: dict, fn):
+    if RATE_LIMIT_SHARED:
+        try:
+            return _apply_shared(name, limits, fn)
+        except Exception as e:
+            print(f"[⚠️ Rate limiter] Shared bucket unavailable, using this process's bucket: {e}")
+    with _local_lock:
+        now = datetime.utcnow()
+        bucket = _local_buckets.setdefault(name, _LocalBucket(limits, now))
+        return fn(bucket, now)
+
+def acquire(name: str, cost: int = 0):
+    """Blocks until the bucket for this model/deployment has room for one request of `cost` tokens."""
+    limits = RATE_LIMITS.get(name)
+    if not limits:
+        return
+    while True:
+        wait = _apply(name, limits, lambda bucket, now: _take(bucket, limits, cost, now))
+        if wait <= 0:
+            return
+        time.sleep(min(wait, RATE_LIMIT_MAX_SLEEP_SECONDS) + random.uniform(0, 0.25))
+
+def report_rate_limited(name: str, retry_after: float = None):
+    limits = RATE_LIMITS.get(name)
+    if limits:
+        _apply(name, limits, lambda bucket, now: _penalize(bucket, retry_after, now))
+
+def _retry_after(error) -> float | None:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+def call_with_rate_limit(name: str, cost: int, func):
+    """
+    Runs func() once the bucket has capacity. A 429 (openai.RateLimitError) backs the bucket off
+    for every caller and the call waits its turn again, up to RATE_LIMIT_MAX_RETRIES times.
+    Connection errors, timeouts and 5xx responses are retried up to TRANSIENT_MAX_RETRIES times
+    with jittered exponential backoff.
+    """
+    rate_limited_attempts, transient_attempts = 0, 0
+    while True:
+        acquire(name, cost)
+        try:
+            return func()
+        except openai.RateLimitError as e:
+            if rate_limited_attempts == RATE_LIMIT_MAX_RETRIES:
+                raise
+            rate_limited_attempts += 1
+            retry_after = _retry_after(e)
+            print(f"[⏳ Rate limited] {name} returned 429; backing off (attempt {rate_limited_attempts}/{RATE_LIMIT_MAX_RETRIES})")
+            report_rate_limited(name, retry_after)
+        except TRANSIENT_ERRORS as e:
+            if transient_attempts == TRANSIENT_MAX_RETRIES:
+                raise
+            transient_attempts += 1
+            delay = min(TRANSIENT_BACKOFF_BASE_SECONDS * 2 ** (transient_attempts - 1), TRANSIENT_BACKOFF_MAX_SECONDS)
+            delay *= random.uniform(0.5, 1.0)
+            print(f"[⚠️ OpenAI error] {name}: {e}; retrying in {delay:.1f}s (attempt {transient_attempts}/{TRANSIENT_MAX_RETRIES})")
+            time.sleep(delay)
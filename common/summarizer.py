@@ -1,24 +1,173 @@
 import os
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
 from dotenv import load_dotenv
 
+from common.tokens import count_tokens, split_by_tokens
+from common.llm_cache import cached_call
+from common.rate_limiter import call_with_rate_limit
+
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# max_retries=0: 429s are retried by common.rate_limiter, which counts them against the shared quota.
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+SUMMARY_MODEL = "gpt-4"
+SYSTEM_PROMPT = "You are a helpful meeting assistant that creates clear, concise summaries."
+# Bump when the prompts below change so cached completions from the old wording are not reused.
+SUMMARY_PROMPT_VERSION = "summary-v1"
+SUMMARY_TEMPERATURE = 0.3
+SUMMARY_MAX_TOKENS = 800
+# gpt-4 has an 8k context. Transcripts under this budget are summarized in one call;
+# anything longer goes through map-reduce over overlapping windows.
+SINGLE_SHOT_MAX_TOKENS = int(os.getenv("SUMMARY_SINGLE_SHOT_MAX_TOKENS", "6000"))
+SUMMARY_WINDOW_TOKENS = int(os.getenv("SUMMARY_WINDOW_TOKENS", "3000"))
+SUMMARY_WINDOW_OVERLAP = int(os.getenv("SUMMARY_WINDOW_OVERLAP", "200"))
+SUMMARY_PARTIAL_MAX_TOKENS = 500
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
 
-def summarize_transcript(transcript_text: str) -> str:
+# Fused mode: one call returns the email summary and the phase 2 classification together,
+# so the transcript is only sent to a model once. Long transcripts still take the two-pass route.
+FUSED_LLM_PASS = os.getenv("FUSED_LLM_PASS", "false").lower() == "true"
+FUSED_PROMPT_VERSION = "fused-v1"
+FUSED_MAX_TOKENS = 1200
+FUSED_FIELDS = ["summary", "action_items", "subsidiary", "department", "meeting_type", "meeting_subtype", "key_decisions", "tags"]
+
+def summarize_transcript(transcript_text: str, raise_errors: bool = False) -> str:
     """
     Analyzes a transcript and returns a human-readable summary for email.
     It now handles cases where transcription might have failed.
+    With raise_errors=True a failed model call raises instead of returning a failure message.
     """
     if not transcript_text or "Transcription failed" in transcript_text:
+        if raise_errors and transcript_text:
+            raise ValueError("Cannot summarize a failed transcription.")
         print("[⚠️ Warning] Transcription was empty or failed. Skipping summary.")
         return "Summary could not be generated because the transcription failed."
 
     try:
-        # This prompt is designed for a clear, human-readable email summary.
-        prompt = f"""
+        if count_tokens(transcript_text) <= SINGLE_SHOT_MAX_TOKENS:
+            summary = _summarize_single(transcript_text)
+        else:
+            summary = _summarize_map_reduce(transcript_text)
+        print("[✅ Summary generated]")
+        return summary
+
+    except Exception as e:
+        print(f"[❌ Error] Summary generation failed: {str(e)}")
+        if raise_errors:
+            raise
+        return "Summary generation failed."
+
+def analyze_transcript(transcript_text: str, participants: list) -> dict | None:
+    """
+    Single-pass summary and classification for FUSED_LLM_PASS mode.
+    Returns a dict with FUSED_FIELDS, or None when fused mode is off, the transcript is too long
+    for one call, or the response is unusable; callers then fall back to summarize_transcript.
+    """
+    if not FUSED_LLM_PASS or not transcript_text or "Transcription failed" in transcript_text:
+        return None
+    if count_tokens(transcript_text) > SINGLE_SHOT_MAX_TOKENS:
+        print("[🧩 Fused analysis] Transcript too long for one pass; using separate summary and classification.")
+        return None
+
+    prompt = f"""
+You are an AI assistant for Ecstasy Holdings. Analyze the following meeting transcript.
+Write a clear email summary of concise bullet points focused on decisions made, follow-up tasks and key discussion points,
+and classify the meeting using its content, keywords and participant roles.
+Return ONLY a valid JSON object with the following schema and nothing else:
+{{
+  "summary": "...",
+  "action_items": ["...", "..."],
+  "subsidiary": "...",
+  "department": "...",
+  "meeting_type": "...",
+  "meeting_subtype": "...",
+  "key_decisions": ["...", "..."],
+  "tags": ["...", "..."]
+}}
+
+Participants:
+{', '.join(participants)}
+
+Transcript:
+\"\"\"
+{transcript_text}
+\"\"\"
+"""
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+    def call():
+        response = call_with_rate_limit(
+            SUMMARY_MODEL, count_tokens(SYSTEM_PROMPT + prompt) + FUSED_MAX_TOKENS,
+            lambda: client.chat.completions.create(
+                model=SUMMARY_MODEL,
+                messages=messages,
+                temperature=0,
+                max_tokens=FUSED_MAX_TOKENS
+            )
+        )
+        # Parsed inside the cached call so an unparseable response raises and is never cached.
+        result = json.loads(response.choices[0].message.content)
+        missing = [field for field in FUSED_FIELDS if field not in result]
+        if missing:
+            raise ValueError(f"response is missing {', '.join(missing)}")
+        return result
+
+    try:
+        analysis = cached_call(
+            SUMMARY_MODEL, FUSED_PROMPT_VERSION, messages, {"temperature": 0, "max_tokens": FUSED_MAX_TOKENS}, call
+        )
+        print("[✅ Fused analysis generated]")
+        return analysis
+    except Exception as e:
+        print(f"[⚠️ Fused analysis failed, falling back to two passes] {e}")
+        return None
+
+def format_fused_summary(analysis: dict) -> str:
+    """Renders the fused analysis as the plain-text summary sent by email."""
+    summary = analysis.get("summary") or ""
+    if isinstance(summary, list):
+        summary = "\n".join(f"- {line}" for line in summary)
+    action_items = analysis.get("action_items") or []
+    if action_items:
+        summary += "\n\nAction items:\n" + "\n".join(f"- {item}" for item in action_items)
+    return summary.strip()
+
+def _complete(prompt: str, max_tokens: int) -> str:
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+    def call():
+        # Waits for room in the shared gpt-4 quota (prompt plus completion budget) instead of failing on 429s.
+        response = call_with_rate_limit(
+            SUMMARY_MODEL, count_tokens(SYSTEM_PROMPT + prompt) + max_tokens,
+            lambda: client.chat.completions.create(
+                model=SUMMARY_MODEL,
+                messages=messages,
+                temperature=SUMMARY_TEMPERATURE,
+                max_tokens=max_tokens
+                # THE FIX: Removed the unsupported 'response_format' argument.
+            )
+        )
+        return response.choices[0].message.content.strip()
+
+    # Every window, reduce step and single-shot summary is cached on its own, so a replayed
+    # meeting (or one whose windows partly match an earlier run) only pays for what changed.
+    return cached_call(
+        SUMMARY_MODEL, SUMMARY_PROMPT_VERSION, messages,
+        {"temperature": SUMMARY_TEMPERATURE, "max_tokens": max_tokens}, call
+    )
+
+def _summarize_single(transcript_text: str) -> str:
+    # This prompt is designed for a clear, human-readable email summary.
+    prompt = f"""
 You are an AI assistant. Summarize the following meeting transcript into concise bullet points and action items.
 Focus on decisions made, follow-up tasks, and key discussion points.
 
@@ -29,22 +178,54 @@ Transcript:
 
 Summary:
 """
+    return _complete(prompt, SUMMARY_MAX_TOKENS)
 
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a helpful meeting assistant that creates clear, concise summaries."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=800
-            # THE FIX: Removed the unsupported 'response_format' argument.
-        )
+def _summarize_map_reduce(transcript_text: str) -> str:
+    windows = split_by_tokens(transcript_text, SUMMARY_WINDOW_TOKENS, SUMMARY_WINDOW_OVERLAP)
+    print(f"[🧩 Summarizing] Transcript split into {len(windows)} windows")
 
-        summary = response.choices[0].message.content.strip()
-        print("[✅ Summary generated]")
-        return summary
+    def summarize_window(item):
+        index, window = item
+        prompt = f"""
+You are an AI assistant. The following is part {index + 1} of {len(windows)} of a longer meeting transcript.
+Parts overlap slightly at the edges. Summarize this part into concise bullet points.
+Capture every decision, follow-up task (with owner if stated) and key discussion point.
 
-    except Exception as e:
-        print(f"[❌ Error] Summary generation failed: {str(e)}")
-        return "Summary generation failed."
\ No newline at end of file
+Transcript part:
+\"\"\"
+{window}
+\"\"\"
+
+Notes:
+"""
+        return _complete(prompt, SUMMARY_PARTIAL_MAX_TOKENS)
+
+    with ThreadPoolExecutor(max_workers=SUMMARY_CONCURRENCY) as pool:
+        partials = list(pool.map(summarize_window, enumerate(windows)))
+
+    return _reduce_partials(partials)
+
+def _reduce_partials(partials: list[str]) -> str:
+    combined = "\n\n".join(f"Part {i + 1}:\n{p}" for i, p in enumerate(partials))
+
+    # Very long meetings can produce more notes than fit in one prompt; reduce them in groups first.
+    if count_tokens(combined) > SINGLE_SHOT_MAX_TOKENS and len(partials) > 2:
+        group_size = max(2, len(partials) // 2)
+        groups = [partials[i:i + group_size] for i in range(0, len(partials), group_size)]
+        with ThreadPoolExecutor(max_workers=SUMMARY_CONCURRENCY) as pool:
+            partials = list(pool.map(_reduce_partials, groups))
+        return _reduce_partials(partials)
+
+    prompt = f"""
+You are an AI assistant. Below are notes taken from consecutive parts of one meeting, in order.
+Merge them into a single summary of concise bullet points and action items, removing duplicates from overlapping parts.
+Focus on decisions made, follow-up tasks, and key discussion points.
+
+Notes:
+\"\"\"
+{combined}
+\"\"\"
+
+Summary:
+"""
+    return _complete(prompt, SUMMARY_MAX_TOKENS)
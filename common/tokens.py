@@ -0,0 +1,21 @@
+# common/tokens.py
+import tiktoken
+
+_encoding = tiktoken.encoding_for_model("gpt-4")
+
+def count_tokens(text: str) -> int:
+    return len(_encoding.encode(text or ""))
+
+def split_by_tokens(text: str, max_tokens: int, overlap: int = 0) -> list[str]:
+    """Splits text into windows of at most max_tokens, each repeating the last `overlap` tokens of the previous one."""
+    tokens = _encoding.encode(text or "")
+    if len(tokens) <= max_tokens:
+        return [text]
+
+    step = max_tokens - overlap
+    windows = []
+    for start in range(0, len(tokens), step):
+        windows.append(_encoding.decode(tokens[start:start + max_tokens]))
+        if start + max_tokens >= len(tokens):
+            break
+    return windows
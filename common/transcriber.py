@@ -1,42 +1,239 @@
 import openai
 import os
-import requests
+import io
+from common import http_client
+from common.rate_limiter import call_with_rate_limit
+import re
+import shutil
 import tempfile
+import traceback
+import subprocess
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 load_dotenv()
-client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# max_retries=0: 429s are retried by common.rate_limiter, which counts them against the shared quota.
+client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
 
-def transcribe_from_blob_url(blob_url):
+# Audio buffers larger than this spill from memory to a temp file in AUDIO_SPOOL_DIR, so every
+# recording above it is written to local disk once more while it is transcribed (~30 MB per hour
+# of Zoom m4a audio). Up to WORKER_CONCURRENCY * WORKER_JOBS_PER_PROCESS recordings (8 by default)
+# are spooled at once: budget that many of the longest expected recordings, e.g. 8 x 2 h ~ 500 MB.
+# Point AUDIO_SPOOL_DIR at a volume sized for that (such as a tmpfs mount) rather than a small
+# ephemeral disk; unset, the system temp directory is used.
+AUDIO_SPOOL_MAX_BYTES = int(os.getenv("AUDIO_SPOOL_MAX_BYTES", str(16 * 1024 * 1024)))
+AUDIO_SPOOL_DIR = os.getenv("AUDIO_SPOOL_DIR") or None
+
+# Long recordings are split into chunks that are transcribed in parallel.
+# whisper-1 rejects uploads above 25 MB, so anything near that must be chunked.
+TRANSCRIBE_CHUNKING_THRESHOLD_BYTES = int(os.getenv("TRANSCRIBE_CHUNKING_THRESHOLD_BYTES", str(10 * 1024 * 1024)))
+TRANSCRIBE_CHUNK_SECONDS = int(os.getenv("TRANSCRIBE_CHUNK_SECONDS", "600"))
+TRANSCRIBE_CONCURRENCY = int(os.getenv("TRANSCRIBE_CONCURRENCY", "4"))
+# How far back from each target cut point we look for a pause to split on.
+SILENCE_SEARCH_SECONDS = 30
+SILENCE_MIN_SECONDS = 0.7
+SILENCE_NOISE_DB = -35
+# Chunks are re-encoded as 16 kHz mono MP3; a 10 minute chunk is ~5 MB.
+CHUNK_EXPORT_BITRATE = "64k"
+WHISPER_MODEL = "whisper-1"
+
+def new_audio_spool():
+    """
+    A file-like buffer for audio that keeps memory use bounded regardless of recording size.
+    Past AUDIO_SPOOL_MAX_BYTES it costs the recording's size on disk in AUDIO_SPOOL_DIR.
+    """
+    if AUDIO_SPOOL_DIR:
+        os.makedirs(AUDIO_SPOOL_DIR, exist_ok=True)
+    return tempfile.SpooledTemporaryFile(max_size=AUDIO_SPOOL_MAX_BYTES, suffix=".m4a", dir=AUDIO_SPOOL_DIR)
+
+def transcribe_audio(audio, filename="audio.m4a", raise_errors=False):
+    """
+    Transcribes audio the pipeline already holds: a local file path, a binary file object
+    (e.g. the spool filled while streaming the recording to blob storage) or raw bytes.
+    On failure returns a "Transcription failed: ..." message, or raises with raise_errors=True.
+    """
+    try:
+        if isinstance(audio, (str, os.PathLike)):
+            print(f"[🎙️ Transcribing] {audio}")
+            if os.path.getsize(audio) > TRANSCRIBE_CHUNKING_THRESHOLD_BYTES:
+                text, _ = transcribe_chunked(audio, os.path.basename(audio))
+                return text
+            with open(audio, "rb") as audio_file:
+                return _transcribe_file(audio_file, os.path.basename(audio))
+
+        if isinstance(audio, (bytes, bytearray)):
+            audio = io.BytesIO(audio)
+        audio.seek(0, os.SEEK_END)
+        size = audio.tell()
+        audio.seek(0)
+
+        if size > TRANSCRIBE_CHUNKING_THRESHOLD_BYTES:
+            text, _ = transcribe_chunked(audio, filename)
+            return text
+
+        print(f"[🎙️ Transcribing] {filename}")
+        return _transcribe_file(audio, filename)
+
+    except Exception as e:
+        print(f"[❌ Error] Transcription failed: {str(e)}")
+        traceback.print_exc()
+        if raise_errors:
+            raise
+        return f"Transcription failed: {e}"
+
+def _transcribe_file(audio_file, filename):
+    def call():
+        # Rewind so a retry after a 429 uploads the whole file again.
+        audio_file.seek(0)
+        # THE FIX: Explicitly tell the model the language is English.
+        return client.audio.transcriptions.create(
+            model=WHISPER_MODEL,
+            file=(filename, audio_file),
+            response_format="text",
+            language="en"  # <-- THIS IS THE CRITICAL FIX
+        )
+
+    # Whisper is limited by requests per minute only.
+    transcript_response = call_with_rate_limit(WHISPER_MODEL, 0, call)
+    print("[✅ Transcription complete]")
+    return transcript_response
+
+def transcribe_chunked(audio, filename="audio.m4a"):
+    """
+    Splits audio on pauses into chunks of at most TRANSCRIBE_CHUNK_SECONDS, transcribes them
+    concurrently and stitches the results back in order.
+    Returns (text, segments) where each segment's start/end are relative to the full recording.
+
+    ffmpeg reads the recording from disk and only decodes what it needs: the short windows
+    searched for pauses and one chunk per upload, so memory stays flat however long the meeting.
+    """
+    suffix = os.path.splitext(filename)[1] or ".m4a"
+    with _local_audio(audio, suffix) as (path, pass_fds):
+        duration = _probe_duration(path, pass_fds)
+        bounds = _chunk_boundaries(path, pass_fds, duration)
+        print(f"[🎙️ Transcribing] {filename} in {len(bounds)} chunks ({duration:.0f}s)")
+
+        def transcribe_chunk(bound):
+            start, end = bound
+            buf = io.BytesIO(_ffmpeg([
+                "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}", "-i", path,
+                "-vn", "-ac", "1", "-ar", "16000", "-b:a", CHUNK_EXPORT_BITRATE, "-f", "mp3", "pipe:1"
+            ], pass_fds).stdout)
+
+            def call():
+                buf.seek(0)
+                return client.audio.transcriptions.create(
+                    model=WHISPER_MODEL,
+                    file=(f"chunk_{int(start * 1000)}.mp3", buf),
+                    response_format="verbose_json",
+                    language="en"
+                )
+
+            response = call_with_rate_limit(WHISPER_MODEL, 0, call)
+            return start, response
+
+        with ThreadPoolExecutor(max_workers=TRANSCRIBE_CONCURRENCY) as pool:
+            results = list(pool.map(transcribe_chunk, bounds))
+
+    texts, segments = [], []
+    for offset, response in results:
+        texts.append(_field(response, "text", "").strip())
+        for seg in _field(response, "segments", None) or []:
+            segments.append({
+                "start": _field(seg, "start", 0.0) + offset,
+                "end": _field(seg, "end", 0.0) + offset,
+                "text": _field(seg, "text", "").strip()
+            })
+
+    print("[✅ Transcription complete]")
+    return " ".join(t for t in texts if t), segments
+
+@contextmanager
+def _local_audio(audio, suffix):
+    """Yields (path, fds to pass) so ffmpeg can seek in the audio without another copy where possible."""
+    if isinstance(audio, (str, os.PathLike)):
+        yield os.fspath(audio), ()
+        return
+    try:
+        # A spool that is still in memory rolls over to its temp file here.
+        fd = audio.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        fd = None
+    if fd is not None:
+        audio.flush()
+        # /dev/fd/N opens the same file with its own offset, so ffmpeg runs can seek independently.
+        yield f"/dev/fd/{fd}", (fd,)
+        return
+    with tempfile.NamedTemporaryFile(suffix=suffix, dir=AUDIO_SPOOL_DIR) as tmp:
+        audio.seek(0)
+        shutil.copyfileobj(audio, tmp)
+        tmp.flush()
+        yield tmp.name, ()
+
+def _run(cmd, pass_fds=()):
+    result = subprocess.run(cmd, capture_output=True, pass_fds=pass_fds)
+    if result.returncode != 0:
+        raise RuntimeError(f"{cmd[0]} failed: {result.stderr.decode(errors='replace')[-500:]}")
+    return result
+
+def _ffmpeg(args, pass_fds=()):
+    return _run(["ffmpeg", "-hide_banner", "-nostdin"] + args, pass_fds)
+
+def _probe_duration(path, pass_fds):
+    result = _run(["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path], pass_fds)
+    return float(result.stdout.decode().strip())
+
+def _last_silence(path, pass_fds, window_start, window_seconds):
+    """Returns the (start, end) of the last pause in the window, in seconds from the window start, or None."""
+    result = _ffmpeg([
+        "-ss", f"{window_start:.3f}", "-t", f"{window_seconds:.3f}", "-i", path, "-vn",
+        "-af", f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_SECONDS}", "-f", "null", "-"
+    ], pass_fds)
+    log = result.stderr.decode(errors="replace")
+    starts = [float(v) for v in re.findall(r"silence_start: (-?[\d.]+)", log)]
+    if not starts:
+        return None
+    ends = [float(v) for v in re.findall(r"silence_end: (-?[\d.]+)", log)]
+    # A pause still running at the end of the window has no silence_end.
+    end = ends[-1] if len(ends) == len(starts) else window_seconds
+    return max(starts[-1], 0.0), min(end, window_seconds)
+
+def _chunk_boundaries(path, pass_fds, duration):
+    """Picks (start, end) cut points in seconds, preferring the last pause before each size limit."""
+    bounds = []
+    start = 0.0
+    while duration - start > TRANSCRIBE_CHUNK_SECONDS:
+        target = start + TRANSCRIBE_CHUNK_SECONDS
+        window_start = max(start, target - SILENCE_SEARCH_SECONDS)
+        # Only decode a short window before the target; never the whole recording.
+        silence = _last_silence(path, pass_fds, window_start, target - window_start)
+        cut = window_start + sum(silence) / 2 if silence else target
+        bounds.append((start, cut))
+        start = cut
+    bounds.append((start, duration))
+    return bounds
+
+def _field(obj, name, default):
+    # The SDK returns typed objects in newer versions and plain dicts in older ones.
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+def transcribe_from_blob_url(blob_url, raise_errors=False):
+    """Re-fetches audio from a blob SAS URL. Used for reprocessing; the live pipeline calls transcribe_audio."""
     try:
         print(f"[⬇️ Downloading audio from Blob] {blob_url}")
-        response = requests.get(blob_url)
-        response.raise_for_status()
-
-        # Use a temporary file to save the audio content
-        with tempfile.NamedTemporaryFile(suffix=".m4a", delete=False) as tmp:
-            tmp.write(response.content)
-            tmp_path = tmp.name
-        
-        print(f"[🎙️ Transcribing] {tmp_path}")
-        with open(tmp_path, "rb") as audio_file:
-            # THE FIX: Explicitly tell the model the language is English.
-            transcript_response = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="text",
-                language="en"  # <-- THIS IS THE CRITICAL FIX
-            )
-
-        print("[✅ Transcription complete]")
-        return transcript_response
+        with http_client.get(blob_url, stream=True, timeout=(10, 300)) as response:
+            response.raise_for_status()
+            with new_audio_spool() as spool:
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    spool.write(chunk)
+                return transcribe_audio(spool, raise_errors=raise_errors)
 
     except Exception as e:
         print(f"[❌ Error] Transcription failed: {str(e)}")
-        import traceback
         traceback.print_exc()
+        if raise_errors:
+            raise
         return f"Transcription failed: {e}"
-    finally:
-        # Ensure the temporary file is always cleaned up
-        if 'tmp_path' in locals() and os.path.exists(tmp_path):
-            os.remove(tmp_path)
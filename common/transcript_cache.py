@@ -0,0 +1,85 @@
+# common/transcript_cache.py
+# Content-addressed transcript cache: the key is the SHA-256 of the audio bytes, so the same
+# recording is only sent to Whisper once no matter how often Zoom re-delivers it or under
+# which recording file id it arrives.
+import os
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from models import TranscriptCache
+
+# Entries older than this are evicted; a re-delivered recording after that is transcribed again.
+TRANSCRIPT_CACHE_TTL_DAYS = int(os.getenv("TRANSCRIPT_CACHE_TTL_DAYS", "30"))
+TRANSCRIPT_CACHE_ENABLED = os.getenv("TRANSCRIPT_CACHE_ENABLED", "true").lower() == "true"
+
+# Lookups served by this process since it started.
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+def _record(hit: bool, audio_sha256: str):
+    with _stats_lock:
+        _stats["hits" if hit else "misses"] += 1
+        hits, misses = _stats["hits"], _stats["misses"]
+    rate = hits / (hits + misses) * 100
+    print(f"[🗃️ Transcript cache] {'Hit' if hit else 'Miss'} for {audio_sha256[:12]} (hits={hits}, misses={misses}, hit rate {rate:.0f}%)")
+
+def _cutoff() -> datetime:
+    return datetime.utcnow() - timedelta(days=TRANSCRIPT_CACHE_TTL_DAYS)
+
+def get_cached_transcript(db: Session, audio_sha256: str):
+    """Returns the cached transcript for this audio, or None. A hit is counted on the row."""
+    if not TRANSCRIPT_CACHE_ENABLED or not audio_sha256:
+        return None
+    entry = db.query(TranscriptCache).filter(
+        TranscriptCache.audio_sha256 == audio_sha256,
+        TranscriptCache.created_at >= _cutoff()
+    ).first()
+    if not entry:
+        _record(False, audio_sha256)
+        return None
+
+    transcript = entry.transcript
+    db.query(TranscriptCache).filter_by(audio_sha256=audio_sha256).update(
+        {"hit_count": TranscriptCache.hit_count + 1, "last_hit_at": datetime.utcnow()},
+        synchronize_session=False
+    )
+    db.commit()
+    _record(True, audio_sha256)
+    return transcript
+
+def store_transcript(db: Session, audio_sha256: str, transcript: str):
+    """Caches a successful transcript and evicts expired entries."""
+    if not TRANSCRIPT_CACHE_ENABLED or not audio_sha256 or not transcript:
+        return
+    if transcript.startswith("Transcription failed"):
+        return
+    # Another worker may have cached the same audio in the meantime; keep the first copy.
+    db.execute(pg_insert(TranscriptCache).values(
+        audio_sha256=audio_sha256, transcript=transcript, hit_count=0, created_at=datetime.utcnow()
+    ).on_conflict_do_nothing())
+    evicted = db.query(TranscriptCache).filter(TranscriptCache.created_at < _cutoff()).delete(synchronize_session=False)
+    db.commit()
+    if evicted:
+        print(f"[🗃️ Transcript cache] Evicted {evicted} expired entries")
+
+def get_cache_stats(db: Session) -> dict:
+    """
+    Hit-rate counters for the cache. Lookups happen in the worker processes, so the shared
+    numbers come from the table: every stored entry was one miss, and hit_count counts reuse.
+    """
+    entries, hits = db.query(func.count(TranscriptCache.audio_sha256), func.coalesce(func.sum(TranscriptCache.hit_count), 0)).one()
+    lookups = entries + hits
+    with _stats_lock:
+        process = dict(_stats)
+    return {
+        "enabled": TRANSCRIPT_CACHE_ENABLED,
+        "ttl_days": TRANSCRIPT_CACHE_TTL_DAYS,
+        "entries": entries,
+        "hits": int(hits),
+        "misses": entries,
+        "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        "process": process
+    }
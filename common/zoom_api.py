@@ -1,10 +1,11 @@
 # common/zoom_api.py
 import os
 import requests
+from common import http_client
 from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
 from models import ScheduledMeeting
-from common.zoom_auth import get_server_token
+from common.zoom_auth import get_server_token, invalidate_server_token
 
 # Load environment variables
 HOST_EMAILS = [
@@ -13,52 +14,66 @@ HOST_EMAILS = [
     "meeting_host2@6t3media.com"
 ]
 
-def is_host_available(db: Session, host_email: str, start_time_iso: str, duration_minutes: int) -> bool:
+def parse_meeting_window(start_time_iso: str, duration_minutes: int):
+    """Parses the requested slot into naive UTC datetimes, matching how start_time is stored."""
     start_time = datetime.fromisoformat(start_time_iso.replace("Z", "+00:00"))
-    end_time = start_time + timedelta(minutes=duration_minutes)
-    
-    # REFACTOR: Replaced psycopg2 with SQLAlchemy session
+    if start_time.tzinfo:
+        start_time = start_time.astimezone(timezone.utc).replace(tzinfo=None)
+    return start_time, start_time + timedelta(minutes=duration_minutes)
+
+def _busy_hosts(db: Session, hosts: list, start_time: datetime, end_time: datetime) -> set:
+    # Two intervals overlap when each starts before the other ends.
+    # Served by idx_scheduled_meetings_host_window, so the cost does not grow with meeting history.
+    rows = db.query(ScheduledMeeting.host_email).filter(
+        ScheduledMeeting.host_email.in_(hosts),
+        ScheduledMeeting.start_time < end_time,
+        ScheduledMeeting.end_time > start_time
+    ).distinct().all()
+    return {row.host_email for row in rows}
+
+def is_host_available(db: Session, host_email: str, start_time_iso: str, duration_minutes: int) -> bool:
+    start_time, end_time = parse_meeting_window(start_time_iso, duration_minutes)
     try:
-        conflicting_meetings = db.query(ScheduledMeeting).filter(
-            ScheduledMeeting.host_email == host_email
-        ).all()
+        return not _busy_hosts(db, [host_email], start_time, end_time)
     except Exception as e:
         print(f"[❌ DB error in is_host_available]: {e}")
         raise
 
-    for meeting in conflicting_meetings:
-        mt_start = meeting.start_time.replace(tzinfo=timezone.utc)
-        mt_end = mt_start + timedelta(minutes=meeting.duration)
-        # Check for overlap
-        if max(start_time, mt_start) < min(end_time, mt_end):
-            return False # Found an overlap, host is not available
-    
-    return True # No overlaps found
-
-# NOTE: The find_available_host function can be simplified now that is_host_available is robust.
-# We can iterate through hosts and check availability one by one.
-def find_available_host(db: Session, start_time_iso: str, duration_minutes: int):
-    for host in HOST_EMAILS:
-        if is_host_available(db, host, start_time_iso, duration_minutes):
-            return host
-    return None
+def find_available_hosts(db: Session, start_time_iso: str, duration_minutes: int, hosts: list = None) -> list:
+    """Returns every host free for the slot, checked with a single query."""
+    hosts = hosts or HOST_EMAILS
+    start_time, end_time = parse_meeting_window(start_time_iso, duration_minutes)
+    busy = _busy_hosts(db, hosts, start_time, end_time)
+    return [host for host in hosts if host not in busy]
 
-def create_zoom_meeting(payload: dict, host_email: str) -> dict:
-    if not host_email:
-        raise ValueError("host_email is required for Zoom meeting creation.")
+def find_available_host(db: Session, start_time_iso: str, duration_minutes: int):
+    available = find_available_hosts(db, start_time_iso, duration_minutes)
+    return available[0] if available else None
 
+def _zoom_request(method: str, url: str, **kwargs):
+    """Calls the Zoom API with the cached token, fetching a new one once if Zoom rejects it."""
     token = get_server_token()
     if not token:
         raise ValueError("Failed to get Zoom API access token.")
 
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-    
+    response = http_client.request(method, url, headers=_zoom_headers(token), **kwargs)
+    if response.status_code == 401:
+        invalidate_server_token(token)
+        response = http_client.request(method, url, headers=_zoom_headers(get_server_token()), **kwargs)
+    return response
+
+def _zoom_headers(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+
+def create_zoom_meeting(payload: dict, host_email: str) -> dict:
+    if not host_email:
+        raise ValueError("host_email is required for Zoom meeting creation.")
+
     try:
-        response = requests.post(
+        response = _zoom_request(
+            "POST",
             f"https://api.zoom.us/v2/users/{host_email}/meetings",
-            headers=headers,
-            json=payload,
-            timeout=10
+            json=payload
         )
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
@@ -73,19 +88,56 @@ def create_zoom_meeting(payload: dict, host_email: str) -> dict:
     return response.json()
 
 def cancel_zoom_meeting(meeting_id: str):
-    token = get_server_token()
-    if not token:
-        raise ValueError("Zoom token missing")
-
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-    
     try:
-        res = requests.delete(
-            f"https://api.zoom.us/v2/meetings/{meeting_id}",
-            headers=headers,
-            timeout=10
+        res = _zoom_request(
+            "DELETE",
+            f"https://api.zoom.us/v2/meetings/{meeting_id}"
         )
         res.raise_for_status()
     except requests.exceptions.RequestException as e:
         print(f"[❌ Zoom cancel error]: {e}")
-        raise Exception("Failed to cancel Zoom meeting")
\ No newline at end of file
+        raise Exception("Failed to cancel Zoom meeting")
+
+def _merge_intervals(intervals: list) -> list:
+    """Sweeps sorted (start, end) pairs and merges any that overlap or touch."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def get_busy_intervals(db: Session, hosts: list, window_start: datetime, window_end: datetime) -> dict:
+    """Loads every host's meetings overlapping the window with one range query. Returns {host: [(start, end), ...]}."""
+    rows = db.query(ScheduledMeeting.host_email, ScheduledMeeting.start_time, ScheduledMeeting.end_time).filter(
+        ScheduledMeeting.host_email.in_(hosts),
+        ScheduledMeeting.start_time < window_end,
+        ScheduledMeeting.end_time > window_start
+    ).all()
+
+    by_host = {host: [] for host in hosts}
+    for row in rows:
+        by_host[row.host_email].append((row.start_time, row.end_time))
+    return by_host
+
+def get_free_busy(db: Session, window_start: datetime, window_end: datetime, min_slot_minutes: int = 15, hosts: list = None) -> dict:
+    """
+    Returns merged busy intervals and free slots for each host between window_start and
+    window_end (naive UTC). All hosts are loaded with one range query.
+    """
+    hosts = hosts or HOST_EMAILS
+    by_host = get_busy_intervals(db, hosts, window_start, window_end)
+
+    min_slot = timedelta(minutes=min_slot_minutes)
+    schedule = {}
+    for host, intervals in by_host.items():
+        busy = _merge_intervals([(max(s, window_start), min(e, window_end)) for s, e in intervals])
+        free = []
+        cursor = window_start
+        for start, end in busy + [[window_end, window_end]]:
+            if start - cursor >= min_slot:
+                free.append([cursor, start])
+            cursor = max(cursor, end)
+        schedule[host] = {"busy": busy, "free": free}
+    return schedule
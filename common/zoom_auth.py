@@ -1,9 +1,24 @@
 import os
-import requests
+import time
+import threading
+from datetime import datetime, timedelta
+from common import http_client
 from dotenv import load_dotenv
 load_dotenv()
 
-def get_server_token():
+# Refresh the token this long before Zoom says it expires.
+TOKEN_REFRESH_MARGIN_SECONDS = int(os.getenv("ZOOM_TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+# When enabled, the token is stored in the service_tokens table so all worker processes
+# and replicas share one token instead of each fetching their own.
+ZOOM_TOKEN_SHARED_CACHE = os.getenv("ZOOM_TOKEN_SHARED_CACHE", "false").lower() == "true"
+SHARED_TOKEN_NAME = "zoom_server_token"
+
+_token_lock = threading.Lock()
+_cached_token = None
+_cached_expires_at = 0.0
+
+def _fetch_token():
+    """Requests a fresh token from Zoom. Returns (access_token, expires_in_seconds)."""
     client_id = os.getenv("ZOOM_CLIENT_ID")
     client_secret = os.getenv("ZOOM_CLIENT_SECRET")
     account_id = os.getenv("ZOOM_ACCOUNT_ID")
@@ -21,7 +36,7 @@ def get_server_token():
         "account_id": account_id
     }
 
-    response = requests.post(
+    response = http_client.post(
         url,
         auth=(client_id, client_secret),
         data=payload
@@ -30,5 +45,71 @@ def get_server_token():
     if response.status_code != 200:
         raise Exception(f"[❌ Zoom Token Error] {response.status_code}: {response.text}")
 
-    access_token = response.json()["access_token"]
-    return access_token
+    data = response.json()
+    print("[🔑 Zoom token] Fetched a new server token")
+    return data["access_token"], int(data.get("expires_in", 3600))
+
+def _get_shared_token(stale_token=None):
+    """
+    Returns the token stored in the DB, refreshing it under a row lock if it is missing,
+    about to expire, or equal to stale_token. Concurrent processes queue on the lock and then
+    reuse the token the first one fetched.
+    """
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    from frontend.db import SessionLocal
+    from models import ServiceToken
+
+    db = SessionLocal()
+    try:
+        # Make sure the row exists so there is always something to lock.
+        db.execute(pg_insert(ServiceToken).values(name=SHARED_TOKEN_NAME).on_conflict_do_nothing())
+        row = db.query(ServiceToken).filter_by(name=SHARED_TOKEN_NAME).with_for_update().one()
+
+        now = datetime.utcnow()
+        if (row.access_token and row.expires_at
+                and row.expires_at - timedelta(seconds=TOKEN_REFRESH_MARGIN_SECONDS) > now
+                and row.access_token != stale_token):
+            token, expires_at = row.access_token, row.expires_at
+            db.rollback()
+        else:
+            token, expires_in = _fetch_token()
+            expires_at = now + timedelta(seconds=expires_in)
+            row.access_token = token
+            row.expires_at = expires_at
+            db.commit()
+        return token, time.time() + (expires_at - now).total_seconds()
+    finally:
+        db.close()
+
+def get_server_token():
+    """
+    Returns a cached Zoom server-to-server token, refreshing it shortly before it expires.
+    Only one thread per process performs a refresh; the others wait and reuse its result.
+    """
+    global _cached_token, _cached_expires_at
+
+    if _cached_token and time.time() < _cached_expires_at:
+        return _cached_token
+
+    with _token_lock:
+        # Another thread may have refreshed while we were waiting for the lock.
+        if _cached_token and time.time() < _cached_expires_at:
+            return _cached_token
+
+        stale_token = _cached_token
+        if ZOOM_TOKEN_SHARED_CACHE:
+            token, expires_at = _get_shared_token(stale_token)
+        else:
+            token, expires_in = _fetch_token()
+            expires_at = time.time() + expires_in
+
+        _cached_token = token
+        _cached_expires_at = expires_at - TOKEN_REFRESH_MARGIN_SECONDS
+        return token
+
+def invalidate_server_token(token):
+    """Drops a token Zoom rejected so the next get_server_token() fetches a new one."""
+    global _cached_expires_at
+    with _token_lock:
+        if _cached_token == token:
+            _cached_expires_at = 0.0
@@ -18,7 +18,10 @@ load_dotenv()
 import sys
 import traceback
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from common.emailer import send_meeting_invite
+from common.emailer import send_meeting_invites
+from common.embeddings import get_embedding
+from common import http_client
+from intelligence_processor.brain.vector_store import get_vector_store
 
 app = Flask(__name__)
 app.secret_key = "supersecretkey"
@@ -65,7 +68,10 @@ def schedule():
     }
 
     try:
-        res = requests.post(f"{API_BASE_URL}/api/create-meeting", json=payload)
+        res = http_client.post(
+            f"{API_BASE_URL}/api/create-meeting", json=payload,
+            timeout=http_client.INTERNAL_API_TIMEOUT, retries=0
+        )
         res.raise_for_status()
         data = res.json()
         
@@ -74,10 +80,9 @@ def schedule():
         data['start_time_gst'] = start_gst.strftime("%Y-%m-%d %H:%M") + " (GST)"
         data['meeting_id'] = data['id']
 
-        # Combine all recipients for the email loop
+        # Combine all recipients into a single bulk send
         all_recipients = participants + [host_email]
-        for email in all_recipients:
-            send_meeting_invite(email, "", data)
+        send_meeting_invites(all_recipients, data)
         
         return render_template("success.html", meeting=data)
 
@@ -93,28 +98,58 @@ def schedule():
         traceback.print_exc()
         return redirect(url_for('create_meeting_form'))
 
+def _brain_meetings_query(db):
+    query = db.query(MeetingLog).filter(MeetingLog.enriched_output_path != None)
+    
+    # Role-based access control
+    if session.get("user_role") != "admin":
+        user_email = session.get("user_email")
+        # Filter for meetings created by the user OR where they were a recipient
+        query = query.filter(
+            or_(
+                MeetingLog.created_by_email == user_email,
+                MeetingLog.recipients.contains(f'"{user_email}"')
+            )
+        )
+    return query
+
 @app.route("/brain")
 def brain_dashboard():
     db = SessionLocal()
     try:
-        query = db.query(MeetingLog).filter(MeetingLog.enriched_output_path != None)
-        
-        # Role-based access control
-        if session.get("user_role") != "admin":
-            user_email = session.get("user_email")
-            # Filter for meetings created by the user OR where they were a recipient
-            query = query.filter(
-                or_(
-                    MeetingLog.created_by_email == user_email,
-                    MeetingLog.recipients.contains(f'"{user_email}"')
-                )
-            )
-            
-        meetings = query.order_by(desc(MeetingLog.meeting_time)).all()
+        meetings = _brain_meetings_query(db).order_by(desc(MeetingLog.meeting_time)).all()
         return render_template("brain_dashboard.html", meetings=meetings)
     finally:
         db.close()
 
+@app.route("/brain/search")
+def brain_search():
+    query_text = request.args.get("q", "").strip()
+    k = min(max(request.args.get("k", 10, type=int), 1), 50)
+    if not query_text:
+        return render_template("brain_search.html", query="", results=[])
+
+    db = SessionLocal()
+    try:
+        # Admins search everything; everyone else only the meetings they can open.
+        meeting_ids = None
+        if session.get("user_role") != "admin":
+            meeting_ids = [row.meeting_id for row in _brain_meetings_query(db).with_entities(MeetingLog.meeting_id)]
+
+        hits = get_vector_store().search(get_embedding(query_text), k=k, meeting_ids=meeting_ids)
+        meetings = {}
+        if hits:
+            found = db.query(MeetingLog).filter(MeetingLog.meeting_id.in_({hit.meeting_id for hit in hits})).all()
+            meetings = {m.meeting_id: m for m in found}
+        results = [{"hit": hit, "meeting": meetings.get(hit.meeting_id)} for hit in hits]
+        return render_template("brain_search.html", query=query_text, results=results)
+    except Exception as e:
+        flash(f"Search failed: {e}", "danger")
+        traceback.print_exc()
+        return redirect(url_for("brain_dashboard"))
+    finally:
+        db.close()
+
 @app.route("/brain/meeting/<meeting_id>")
 def brain_meeting_detail(meeting_id):
     db = SessionLocal()
@@ -3,6 +3,7 @@ from flask import Blueprint, request, redirect, render_template, session, flash,
 from werkzeug.security import generate_password_hash, check_password_hash
 import os
 import requests
+from common import http_client
 from sqlalchemy import desc, or_
 
 from models import User, MeetingLog, ScheduledMeeting
@@ -115,7 +116,10 @@ def cancel_meeting():
 
     try:
         api_base_url = os.getenv('API_BASE_URL')
-        res = requests.delete(f"{api_base_url}/api/cancel-meeting/{meeting_id}")
+        res = http_client.delete(
+            f"{api_base_url}/api/cancel-meeting/{meeting_id}",
+            timeout=http_client.INTERNAL_API_TIMEOUT, retries=0
+        )
         res.raise_for_status()
         flash("Meeting cancelled successfully.", "success")
     except requests.exceptions.RequestException as e:
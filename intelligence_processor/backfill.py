@@ -0,0 +1,246 @@
+# intelligence_processor/backfill.py
+# Re-enriches existing meetings (classification, MeetingLog metadata, search passages, enriched JSON)
+# without re-uploading transcripts to raw-transcripts-phase2.
+#
+# Run from the intelligence_processor directory with the Function app settings in the environment:
+#   python backfill.py --since 2025-01-01 --missing subsidiary tags --concurrency 4 --max-per-minute 60
+# Re-running with the same filters retries meetings that failed, then resumes after the last
+# committed batch (see --checkpoint).
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+MISSING_FIELDS = ("subsidiary", "department", "meeting_type", "meeting_subtype", "tags", "key_decisions", "enriched_output_path")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Re-run phase 2 enrichment over existing meetings.")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only meetings at or after this date/time (meeting_time, UTC)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Only meetings before this date/time (meeting_time, UTC)")
+    parser.add_argument("--subsidiary", action="append", help="Only meetings classified under this subsidiary (repeatable)")
+    parser.add_argument("--missing", nargs="+", choices=MISSING_FIELDS, default=[],
+                        help="Only meetings where any of these fields is empty")
+    parser.add_argument("--reuse-fused", action="store_true",
+                        help="Reuse the phase 1 fused analysis where present instead of calling the classifier")
+    parser.add_argument("--training-queue", action="store_true",
+                        help="Also add training queue entries (off by default so re-runs do not duplicate them)")
+    parser.add_argument("--no-vectorize", action="store_true", help="Skip search indexing (the enriched JSON is still uploaded)")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the LLM cache")
+    parser.add_argument("--concurrency", type=int, default=4, help="Meetings enriched in parallel")
+    parser.add_argument("--max-per-minute", type=float, default=60, help="Upper bound on meetings started per minute")
+    parser.add_argument("--batch-size", type=int, default=25, help="Meetings per DB commit and checkpoint")
+    parser.add_argument("--limit", type=int, help="Stop after this many meetings")
+    parser.add_argument("--checkpoint", default="backfill_checkpoint.json", help="Checkpoint file for resuming")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start from the beginning")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the meetings that would be processed")
+    return parser.parse_args(argv)
+
+class RateLimiter:
+    """Spaces calls to at most max_per_minute across all threads."""
+
+    def __init__(self, max_per_minute: float):
+        self._interval = 60.0 / max_per_minute if max_per_minute > 0 else 0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def _filters_key(args) -> str:
+    filters = {
+        "since": args.since.isoformat() if args.since else None,
+        "until": args.until.isoformat() if args.until else None,
+        "subsidiary": sorted(args.subsidiary or []),
+        "missing": sorted(args.missing)
+    }
+    return hashlib.sha256(json.dumps(filters, sort_keys=True).encode()).hexdigest()[:16]
+
+def load_checkpoint(args) -> dict:
+    if args.restart or not os.path.exists(args.checkpoint):
+        return {"filters": _filters_key(args), "last_meeting_id": None, "processed": 0, "failed": []}
+    with open(args.checkpoint, "r") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("filters") != _filters_key(args):
+        sys.exit(f"{args.checkpoint} was written for different filters. Use --restart or another --checkpoint file.")
+    logging.info(f"Resuming after meeting {checkpoint['last_meeting_id']} ({checkpoint['processed']} already processed).")
+    return checkpoint
+
+def save_checkpoint(path: str, checkpoint: dict):
+    # Write then rename so an interrupted run never leaves a half-written checkpoint.
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+def _missing_clause(column):
+    from sqlalchemy import or_, cast, Text
+    from sqlalchemy.dialects.postgresql import JSONB
+
+    if isinstance(column.type, JSONB):
+        # The ORM writes Python None into JSONB as a JSON null rather than SQL NULL.
+        return or_(column.is_(None), cast(column, Text).in_(["null", "[]"]))
+    return or_(column.is_(None), column == "")
+
+def build_query(db, args, after_meeting_id=None):
+    from sqlalchemy import or_
+    from models import MeetingLog
+
+    query = db.query(MeetingLog.meeting_id, MeetingLog.transcript, MeetingLog.fused_analysis).filter(
+        MeetingLog.transcript != None, MeetingLog.transcript != ""
+    )
+    if args.since:
+        query = query.filter(MeetingLog.meeting_time >= args.since)
+    if args.until:
+        query = query.filter(MeetingLog.meeting_time < args.until)
+    if args.subsidiary:
+        query = query.filter(MeetingLog.subsidiary.in_(args.subsidiary))
+    if args.missing:
+        query = query.filter(or_(*[_missing_clause(getattr(MeetingLog, field)) for field in args.missing]))
+    if after_meeting_id is not None:
+        query = query.filter(MeetingLog.meeting_id > after_meeting_id)
+    # A stable order is what makes "resume after the last committed id" correct.
+    return query.order_by(MeetingLog.meeting_id)
+
+def build_retry_query(db, meeting_ids):
+    """Meetings that failed on an earlier run. The filters are not re-applied: a failed meeting may
+    already have its classification committed and so no longer look "missing"."""
+    from models import MeetingLog
+
+    return db.query(MeetingLog.meeting_id, MeetingLog.transcript, MeetingLog.fused_analysis).filter(
+        MeetingLog.meeting_id.in_(meeting_ids), MeetingLog.transcript != None, MeetingLog.transcript != ""
+    ).order_by(MeetingLog.meeting_id)
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def run(args):
+    if args.no_cache:
+        # Read by brain.llm_cache at import time.
+        os.environ["LLM_CACHE_BYPASS"] = "true"
+
+    from brain import enrichment
+    from brain.vector_store import get_vector_store
+    from frontend.db import SessionLocal
+    from models import MeetingLog
+
+    checkpoint = load_checkpoint(args)
+    limiter = RateLimiter(args.max_per_minute)
+    read_db, write_db = SessionLocal(), SessionLocal()
+    started = time.monotonic()
+
+    try:
+        query = build_query(read_db, args, checkpoint["last_meeting_id"])
+        if args.dry_run:
+            print(f"{query.count()} meetings match, plus {len(checkpoint['failed'])} to retry from earlier runs.")
+            return
+
+        if args.limit:
+            query = query.limit(args.limit)
+
+        def classify(item):
+            row, participants = item
+            limiter.wait()
+            fused = row.fused_analysis if args.reuse_fused else None
+            try:
+                return row, enrichment.classify_meeting(row.transcript, participants, fused), None
+            except Exception as e:
+                return row, None, e
+
+        def publish(item):
+            row, classification, participants, output_blob_path, processed_at = item
+            try:
+                vectorized = enrichment.publish_enrichment(
+                    row.meeting_id, row.transcript, classification, participants,
+                    output_blob_path, processed_at, f"raw-transcripts-phase2/{row.meeting_id}/transcript.txt",
+                    vectorize=not args.no_vectorize
+                )
+                return None if vectorized else (row.meeting_id, "vectorization failed")
+            except Exception as e:
+                return row.meeting_id, e
+
+        def process_batch(pool, batch) -> list:
+            """Enriches one batch and returns the ids of the meetings that did not complete."""
+            participants = {row.meeting_id: enrichment.load_participants(write_db, row.meeting_id) for row in batch}
+            classified = list(pool.map(classify, [(row, participants[row.meeting_id][0]) for row in batch]))
+
+            failed, to_publish = [], []
+            logs = {m.meeting_id: m for m in write_db.query(MeetingLog).filter(MeetingLog.meeting_id.in_([r.meeting_id for r in batch]))}
+            for row, classification, error in classified:
+                if error is not None:
+                    logging.error(f"Meeting {row.meeting_id}: {error}")
+                    failed.append(row.meeting_id)
+                    continue
+                processed_at = datetime.now(timezone.utc)
+                output_blob_path = enrichment.build_output_path(row.meeting_id, classification, processed_at)
+                enrichment.apply_classification(
+                    write_db, logs[row.meeting_id], classification, output_blob_path,
+                    participants[row.meeting_id][1], add_training=args.training_queue
+                )
+                to_publish.append((row, classification, participants[row.meeting_id][0], output_blob_path, processed_at))
+            write_db.commit()
+
+            for result in pool.map(publish, to_publish):
+                if result is not None:
+                    logging.error(f"Meeting {result[0]}: publishing failed: {result[1]}")
+                    failed.append(result[0])
+            if not args.no_vectorize and not get_vector_store().flush():
+                # The sink cannot say which documents were dropped, so retry every meeting it was given.
+                logging.error("Some search documents in this batch could not be indexed; the batch will be retried.")
+                failed = list(dict.fromkeys(failed + [item[0].meeting_id for item in to_publish]))
+            return failed
+
+        def record(batch, failed, advance: bool):
+            retried = {row.meeting_id for row in batch} - set(failed)
+            checkpoint["processed"] += len(batch) - len(failed)
+            checkpoint["failed"] = sorted((set(checkpoint["failed"]) - retried) | set(failed))
+            if advance:
+                checkpoint["last_meeting_id"] = batch[-1].meeting_id
+            checkpoint["updated_at"] = datetime.now(timezone.utc).isoformat()
+            save_checkpoint(args.checkpoint, checkpoint)
+
+            elapsed = time.monotonic() - started
+            print(f"[🔁 Backfill] {checkpoint['processed']} processed, {len(checkpoint['failed'])} failed, "
+                  f"last {checkpoint['last_meeting_id']} ({elapsed:.0f}s)")
+
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            # Meetings that failed on an earlier run are retried first; the checkpoint only moves
+            # past a meeting for good once it has been enriched.
+            if checkpoint["failed"]:
+                logging.info(f"Retrying {len(checkpoint['failed'])} meetings that failed on an earlier run.")
+                for batch in _batches(build_retry_query(read_db, checkpoint["failed"]).yield_per(max(args.batch_size * 4, 100)), args.batch_size):
+                    record(batch, process_batch(pool, batch), advance=False)
+
+            # Server-side cursor (yield_per implies stream_results): rows, transcripts included,
+            # are fetched in chunks instead of being loaded all at once.
+            for batch in _batches(query.yield_per(max(args.batch_size * 4, 100)), args.batch_size):
+                record(batch, process_batch(pool, batch), advance=True)
+    except BaseException:
+        write_db.rollback()
+        raise
+    finally:
+        read_db.close()
+        write_db.close()
+
+    print(f"[✅ Backfill] Done. {checkpoint['processed']} meetings enriched; failed: {checkpoint['failed'] or 'none'}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    run(parse_args())
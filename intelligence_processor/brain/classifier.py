@@ -4,6 +4,9 @@ import os
 import json
 import logging
 from openai import AzureOpenAI
+from brain.llm_cache import cached_call
+from brain.rate_limiter import call_with_rate_limit
+from brain.tokens import count_tokens
 
 # --- Configuration ---
 # This is the new, correct way to initialize the client for openai v1.0+
@@ -11,7 +14,8 @@ try:
     client = AzureOpenAI(
         api_key=os.getenv("OPENAI_API_KEY"),  
         api_version="2023-07-01-preview",
-        azure_endpoint=os.getenv("OPENAI_ENDPOINT")
+        azure_endpoint=os.getenv("OPENAI_ENDPOINT"),
+        max_retries=0 # 429s are retried by brain.rate_limiter, which counts them against the shared quota
     )
     # This is the name of the model you deployed in the Azure OpenAI studio
     MODEL_DEPLOYMENT_NAME = "gpt4-classifier" 
@@ -19,6 +23,9 @@ except Exception as e:
     logging.error(f"Failed to initialize OpenAI client: {e}")
     raise
 
+# Bump when the prompts below change so cached classifications from the old wording are not reused.
+CLASSIFIER_PROMPT_VERSION = "classify-v1"
+
 def classify_transcript(transcript_text: str, participants: list) -> dict:
     """
     Uses Azure OpenAI (GPT-4) to classify a meeting transcript.
@@ -47,20 +54,33 @@ def classify_transcript(transcript_text: str, participants: list) -> dict:
     {', '.join(participants)}
     """
     
-    try:
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+    result_text = None
+
+    def call():
+        nonlocal result_text
+        # Waits for room in the deployment's shared quota instead of failing on 429s.
         # THE FIX: This is the new syntax for making the API call.
-        response = client.chat.completions.create(
-            model=MODEL_DEPLOYMENT_NAME, # The parameter is now 'model' instead of 'engine'
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0,
-            max_tokens=500
+        response = call_with_rate_limit(
+            MODEL_DEPLOYMENT_NAME, count_tokens(system_prompt + user_prompt) + 500,
+            lambda: client.chat.completions.create(
+                model=MODEL_DEPLOYMENT_NAME, # The parameter is now 'model' instead of 'engine'
+                messages=messages,
+                temperature=0,
+                max_tokens=500
+            )
         )
-        
         result_text = response.choices[0].message.content
-        classification_result = json.loads(result_text)
+        # Parsed inside the cached call so an unparseable response raises and is never cached.
+        return json.loads(result_text)
+
+    try:
+        classification_result = cached_call(
+            MODEL_DEPLOYMENT_NAME, CLASSIFIER_PROMPT_VERSION, messages, {"temperature": 0, "max_tokens": 500}, call
+        )
         
         logging.info(f"-> OpenAI classification successful: {classification_result}")
         return classification_result
@@ -0,0 +1,112 @@
+# intelligence_processor/brain/enrichment.py
+# Phase 2 enrichment steps shared by the blob trigger and the backfill command.
+import os
+import json
+import logging
+from datetime import datetime
+from sqlalchemy.orm import Session
+from azure.storage.blob import BlobServiceClient
+
+from brain import classifier, queue_manager, vectorizer
+from brain.participants import resolve_participants, DirectoryUser
+from models import MeetingLog, ScheduledMeeting
+
+CLASSIFICATION_FIELDS = ("subsidiary", "department", "meeting_type", "meeting_subtype", "key_decisions", "tags")
+ENRICHED_OUTPUT_CONTAINER = "enriched-output-phase2"
+
+def load_participants(db: Session, meeting_id: str) -> tuple[list[str], list[DirectoryUser]]:
+    """Returns (participant labels for the prompt, internal users) for the meeting's invitees."""
+    scheduled_meeting = db.query(ScheduledMeeting.participants).filter(ScheduledMeeting.meeting_id == meeting_id).first()
+    if scheduled_meeting and scheduled_meeting.participants:
+        participant_emails = json.loads(scheduled_meeting.participants)
+        logging.info(f"Found invited participants: {participant_emails}")
+
+        # One IN query for the whole list instead of one query per participant.
+        participants = resolve_participants(db, participant_emails)
+        return [p.label for p in participants], [p.user for p in participants if p.internal]
+
+    logging.warning(f"No scheduled meeting or participants found for {meeting_id}. Using placeholder.")
+    return ["Syed Owais", "Rain"], [] # Fallback
+
+def classify_meeting(transcript_text: str, participants: list[str], fused_analysis: dict = None) -> dict:
+    """
+    Returns the classification for a meeting. Phase 1 may already have classified the meeting in
+    its fused summary pass; that is reused instead of sending the transcript to the model again.
+    Raises if classification fails.
+    """
+    if fused_analysis:
+        logging.info("Reusing the fused analysis from phase 1; skipping the classifier call.")
+        classification_result = {field: fused_analysis.get(field) for field in CLASSIFICATION_FIELDS}
+        classification_result["key_decisions"] = classification_result["key_decisions"] or []
+        classification_result["tags"] = classification_result["tags"] or []
+    else:
+        classification_result = classifier.classify_transcript(
+            transcript_text=transcript_text,
+            participants=participants
+        )
+    if "error" in classification_result:
+        raise Exception(f"Classification failed: {classification_result['error']}")
+    logging.info(f"✅ Classification Result: {classification_result}")
+    return classification_result
+
+def build_output_path(meeting_id: str, classification_result: dict, processed_at: datetime) -> str:
+    subsidiary = (classification_result.get("subsidiary") or "UnknownSubsidiary").replace(" ", "")
+    meeting_type = (classification_result.get("meeting_type") or "UnknownType").replace(" ", "")
+    file_friendly_id = f"{processed_at.date().isoformat()}_{meeting_id}.json"
+    return f"{processed_at.strftime('%Y')}/{subsidiary}/{meeting_type}/{file_friendly_id}"
+
+def apply_classification(db: Session, meeting_log: MeetingLog, classification_result: dict, output_blob_path: str,
+                         internal_users: list[DirectoryUser], add_training: bool = True):
+    """Stages the AI metadata (and training queue entries) on the session. The caller commits."""
+    meeting_log.subsidiary = classification_result.get("subsidiary")
+    meeting_log.department = classification_result.get("department")
+    meeting_log.meeting_type = classification_result.get("meeting_type")
+    meeting_log.meeting_subtype = classification_result.get("meeting_subtype")
+    meeting_log.tags = classification_result.get("tags")
+    meeting_log.key_decisions = classification_result.get("key_decisions")
+    meeting_log.enriched_output_path = output_blob_path
+
+    if add_training:
+        # THE FIX: Pass the meeting_log object and the list of internal users
+        queue_manager.add_to_training_queue(db, classification_result, meeting_log, internal_users)
+
+def publish_enrichment(meeting_id: str, transcript_text: str, classification_result: dict, participants: list[str],
+                       output_blob_path: str, processed_at: datetime, transcript_blob_path: str,
+                       vectorize: bool = True, flush: bool = False):
+    """
+    Vectorizes the transcript and uploads the final JSON output. Run after the DB commit.
+    With flush=True the search documents are written before returning, and a failed write raises.
+    Returns False if the transcript could not be vectorized; the JSON output is uploaded either way.
+    """
+    processed_at_iso = processed_at.isoformat()
+    vectorized = True
+    if vectorize:
+        vectorized = vectorizer.vectorize_and_save(
+            transcript_text=transcript_text,
+            classification_result=classification_result,
+            meeting_id=meeting_id,
+            meeting_date=processed_at_iso,
+            flush=flush
+        )
+
+    final_json_output = {
+      "meetingId": meeting_id,
+      "dateTime": processed_at_iso,
+      "classification": classification_result,
+      "participants": participants,
+      "transcript_blob_path": transcript_blob_path
+    }
+    logging.info(f"Saving final JSON output to: {output_blob_path}")
+    blob_client = _output_container().get_blob_client(output_blob_path)
+    blob_client.upload_blob(json.dumps(final_json_output, indent=2), overwrite=True)
+    logging.info("✅ Successfully uploaded final JSON output.")
+    return vectorized
+
+_container_client = None
+
+def _output_container():
+    global _container_client
+    if _container_client is None:
+        blob_service_client = BlobServiceClient.from_connection_string(os.getenv("AzureWebJobsStorage"))
+        _container_client = blob_service_client.get_container_client(ENRICHED_OUTPUT_CONTAINER)
+    return _container_client
@@ -0,0 +1,80 @@
+# intelligence_processor/brain/participants.py
+# Resolves invited participants against the users table in one round trip.
+import os
+import time
+import logging
+import threading
+from typing import NamedTuple, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from models import User
+
+# Registrations happen in the web app, which cannot reach this process's cache. Each lookup
+# first reads the users table's row count and highest id; when either changed since the cache
+# was filled (a user registered or was removed), the cache is dropped. The TTL bounds how long
+# other edits, such as a role change, can stay stale.
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "300"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+class DirectoryUser(NamedTuple):
+    id: int
+    email: str
+    role: Optional[str]
+
+class Participant(NamedTuple):
+    email: str
+    user: Optional[DirectoryUser]
+
+    @property
+    def internal(self) -> bool:
+        return self.user is not None
+
+    @property
+    def label(self) -> str:
+        return f"{self.email} ({'Internal' if self.internal else 'External'})"
+
+_cache_lock = threading.Lock()
+_cache = {} # email -> (expires_at, DirectoryUser or None); None caches "not a registered user"
+_cache_version = None # (row count, max id) of the users table when the cache was filled
+
+def _check_users_version(db: Session):
+    """Clears the cache if users were added or removed since it was filled."""
+    global _cache_version
+    version = tuple(db.query(func.count(User.id), func.max(User.id)).one())
+    with _cache_lock:
+        if version != _cache_version:
+            _cache.clear()
+            _cache_version = version
+
+def resolve_participants(db: Session, emails: list[str]) -> list[Participant]:
+    """
+    Classifies each email as internal (a registered user) or external, keeping the input order.
+    Emails not in the cache are looked up together with a single IN query.
+    """
+    emails = list(dict.fromkeys(e.strip() for e in emails if e and e.strip()))
+    if not emails:
+        return []
+    _check_users_version(db)
+    now = time.monotonic()
+    resolved, missing = {}, []
+    with _cache_lock:
+        for email in emails:
+            cached = _cache.get(email)
+            if cached and cached[0] > now:
+                resolved[email] = cached[1]
+            else:
+                missing.append(email)
+
+    if missing:
+        rows = db.query(User.id, User.email, User.role).filter(User.email.in_(missing)).all()
+        found = {row.email: DirectoryUser(row.id, row.email, row.role) for row in rows}
+        expires_at = now + USER_CACHE_TTL_SECONDS
+        with _cache_lock:
+            if len(_cache) + len(missing) > USER_CACHE_MAX_ENTRIES:
+                _cache.clear()
+            for email in missing:
+                resolved[email] = found.get(email)
+                _cache[email] = (expires_at, resolved[email])
+        logging.info(f"-> Resolved {len(missing)} participants from the database ({len(found)} internal), {len(emails) - len(missing)} from cache.")
+
+    return [Participant(email, resolved[email]) for email in emails]
@@ -1,11 +1,12 @@
 # intelligence_processor/brain/queue_manager.py
 import logging
 from sqlalchemy.orm import Session
-from models import TrainingQueue, MeetingLog, User
+from models import TrainingQueue, MeetingLog
+from brain.participants import DirectoryUser
 
 # THE FIX: The function now accepts the meeting_log object directly
-# and a list of internal User objects.
-def add_to_training_queue(db: Session, classification_result: dict, meeting_log: MeetingLog, internal_users: list[User]):
+# and a list of internal users (DirectoryUser records from brain.participants).
+def add_to_training_queue(db: Session, classification_result: dict, meeting_log: MeetingLog, internal_users: list[DirectoryUser]):
     """
     Checks for coaching-related tags and adds entries to the training queue in PostgreSQL.
     """
@@ -18,17 +19,28 @@ def add_to_training_queue(db: Session, classification_result: dict, meeting_log:
         return
 
     logging.info(f"Coaching tags found: {', '.join(found_tags)}. Adding to training queue for meeting {meeting_log.meeting_id}.")
-    
+
+    # The trigger can run again for the same meeting (a retried invocation or a re-uploaded
+    # transcript), so entries that already exist for a user and category are not added twice.
+    existing = set(
+        db.query(TrainingQueue.participant_user_id, TrainingQueue.coaching_category)
+        .filter(TrainingQueue.meeting_id == meeting_log.meeting_id)
+        .all()
+    )
+
     # For each internal user who was invited, create a training queue entry
     for user in internal_users:
         for tag in found_tags:
+            category = tag.replace("#", "")
+            if (user.id, category) in existing:
+                continue
             new_training_entry = TrainingQueue(
-                # THE FIX: Use the integer ID from the meeting_log object
-                meeting_id=meeting_log.id, 
+                meeting_id=meeting_log.meeting_id,
                 participant_user_id=user.id,
-                coaching_category=tag.replace("#", "")
+                coaching_category=category
             )
             db.add(new_training_entry)
+            existing.add((user.id, category))
             logging.info(f"Staged training entry for user '{user.email}' with category '{tag}'")
     
     return True
\ No newline at end of file
@@ -0,0 +1,237 @@
+# intelligence_processor/brain/search_sink.py
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+from azure.core.credentials import AzureKeyCredential
+from azure.core.exceptions import ResourceNotFoundError
+from azure.search.documents import SearchClient
+from azure.search.documents.indexes import SearchIndexClient
+from azure.search.documents.indexes.models import (
+    SearchIndex, SearchField, SearchFieldDataType, SimpleField, SearchableField,
+    VectorSearch, HnswAlgorithmConfiguration, VectorSearchProfile
+)
+from .vector_store import EMBEDDING_DIMENSIONS
+
+# --- Configuration ---
+INDEX_NAME = "meeting-brain-index"
+AI_SEARCH_ENDPOINT = os.getenv("AI_SEARCH_ENDPOINT")
+AI_SEARCH_KEY = os.getenv("AI_SEARCH_KEY")
+
+# A buffer is flushed when it holds this many documents, this many bytes of JSON,
+# or its oldest document has waited this long. Azure AI Search accepts at most
+# 1000 documents and 16 MB per indexing request.
+SEARCH_SINK_MAX_DOCS = int(os.getenv("SEARCH_SINK_MAX_DOCS", "500"))
+SEARCH_SINK_MAX_BYTES = int(os.getenv("SEARCH_SINK_MAX_BYTES", str(8 * 1024 * 1024)))
+SEARCH_SINK_MAX_WAIT_SECONDS = float(os.getenv("SEARCH_SINK_MAX_WAIT_SECONDS", "5"))
+# Documents that fail inside a batch are retried one by one this many times.
+SEARCH_SINK_RETRIES = int(os.getenv("SEARCH_SINK_RETRIES", "3"))
+# Create the index, or add fields missing from it, when the sink is first used (needs an admin key).
+SEARCH_INDEX_AUTO_UPDATE = os.getenv("SEARCH_INDEX_AUTO_UPDATE", "true").lower() == "true"
+VECTOR_PROFILE_NAME = "content-vector-profile"
+
+def build_search_index() -> SearchIndex:
+    """
+    Schema for the passage documents built by vectorizer.vectorize_and_save. meeting_id must be
+    filterable: /brain/search restricts results with search.in(meeting_id, ...).
+    """
+    return SearchIndex(
+        name=INDEX_NAME,
+        fields=[
+            SimpleField(name="id", type=SearchFieldDataType.String, key=True),
+            SimpleField(name="meeting_id", type=SearchFieldDataType.String, filterable=True),
+            SimpleField(name="passage_index", type=SearchFieldDataType.Int32, filterable=True, sortable=True),
+            SimpleField(name="meeting_date", type=SearchFieldDataType.DateTimeOffset, filterable=True, sortable=True),
+            SearchableField(name="transcript_content", type=SearchFieldDataType.String),
+            SearchableField(name="summary_content", type=SearchFieldDataType.String),
+            SearchField(
+                name="content_vector", type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
+                searchable=True, vector_search_dimensions=EMBEDDING_DIMENSIONS,
+                vector_search_profile_name=VECTOR_PROFILE_NAME
+            ),
+            SimpleField(name="subsidiary", type=SearchFieldDataType.String, filterable=True, facetable=True),
+            SimpleField(name="department", type=SearchFieldDataType.String, filterable=True, facetable=True),
+            SimpleField(name="participants", type=SearchFieldDataType.Collection(SearchFieldDataType.String), filterable=True),
+            SimpleField(name="tags", type=SearchFieldDataType.Collection(SearchFieldDataType.String), filterable=True, facetable=True)
+        ],
+        vector_search=VectorSearch(
+            algorithms=[HnswAlgorithmConfiguration(name="content-vector-hnsw")],
+            profiles=[VectorSearchProfile(name=VECTOR_PROFILE_NAME, algorithm_configuration_name="content-vector-hnsw")]
+        )
+    )
+
+def ensure_search_index():
+    """
+    Creates meeting-brain-index, or adds the fields an index created for the older
+    whole-transcript documents lacks (meeting_id, passage_index). Search cannot change an
+    existing field in place; if meeting_id exists but is not filterable the index must be rebuilt.
+    """
+    index_client = SearchIndexClient(endpoint=AI_SEARCH_ENDPOINT, credential=AzureKeyCredential(AI_SEARCH_KEY))
+    wanted = build_search_index()
+    try:
+        index = index_client.get_index(INDEX_NAME)
+    except ResourceNotFoundError:
+        index_client.create_index(wanted)
+        logging.info(f"-> Created search index '{INDEX_NAME}'.")
+        return
+
+    existing = {field.name: field for field in index.fields}
+    missing = [field for field in wanted.fields if field.name not in existing]
+    if missing:
+        index.fields.extend(missing)
+        index_client.create_or_update_index(index)
+        logging.info(f"-> Added {', '.join(f.name for f in missing)} to search index '{INDEX_NAME}'.")
+    if "meeting_id" in existing and not existing["meeting_id"].filterable:
+        logging.error(f"Search index '{INDEX_NAME}' has a non-filterable meeting_id; rebuild it from build_search_index().")
+
+class SearchSink:
+    """
+    Buffers search documents and writes them with batched merge_or_upload calls.
+    Documents are keyed by "id", so a newer version of a document replaces a buffered one.
+    A background thread flushes buffers that have waited SEARCH_SINK_MAX_WAIT_SECONDS.
+    """
+
+    def __init__(self, client: SearchClient):
+        self._client = client
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._buffer = {} # id -> (document, size in bytes)
+        self._bytes = 0
+        self._oldest = None
+        self._stop = threading.Event()
+        self._timer = threading.Thread(target=self._run_timer, name="search-sink", daemon=True)
+        self._timer.start()
+
+    @property
+    def client(self) -> SearchClient:
+        """The shared SearchClient, also used for queries."""
+        return self._client
+
+    def add(self, documents: list[dict]):
+        with self._lock:
+            for document in documents:
+                size = len(json.dumps(document))
+                previous = self._buffer.pop(document["id"], None)
+                if previous:
+                    self._bytes -= previous[1]
+                self._buffer[document["id"]] = (document, size)
+                self._bytes += size
+            if self._oldest is None and self._buffer:
+                self._oldest = time.monotonic()
+            full = len(self._buffer) >= SEARCH_SINK_MAX_DOCS or self._bytes >= SEARCH_SINK_MAX_BYTES
+        if full:
+            self.flush()
+
+    def flush(self) -> bool:
+        """Writes everything buffered so far. Returns False if any document could not be indexed."""
+        with self._flush_lock:
+            with self._lock:
+                pending = list(self._buffer.values())
+                self._buffer, self._bytes, self._oldest = {}, 0, None
+            if not pending:
+                return True
+
+            ok = True
+            for batch in self._batches(pending):
+                ok = self._upload(batch) and ok
+            return ok
+
+    def delete_meeting(self, meeting_id: str, keep_passages: int):
+        """
+        Deletes the meeting's legacy whole-transcript document (id = meeting_id) and any passages
+        at or past keep_passages left over from an earlier, longer indexing of the same meeting.
+        """
+        # Deleting an id that does not exist succeeds, so the legacy id is always sent.
+        self._client.delete_documents(documents=[{"id": meeting_id}])
+
+        escaped = meeting_id.replace("'", "''")
+        stale = [r["id"] for r in self._client.search(
+            search_text="*", filter=f"meeting_id eq '{escaped}' and passage_index ge {keep_passages}", select=["id"]
+        )]
+        if stale:
+            self._client.delete_documents(documents=[{"id": i} for i in stale])
+            logging.info(f"-> Deleted {len(stale)} stale passages for meeting '{meeting_id}'.")
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+    def _batches(self, pending):
+        batch, batch_bytes = [], 0
+        for document, size in pending:
+            if batch and (len(batch) >= SEARCH_SINK_MAX_DOCS or batch_bytes + size > SEARCH_SINK_MAX_BYTES):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(document)
+            batch_bytes += size
+        if batch:
+            yield batch
+
+    def _upload(self, batch: list[dict]) -> bool:
+        try:
+            results = self._client.merge_or_upload_documents(documents=batch)
+            failed_keys = {r.key for r in results if not r.succeeded}
+        except Exception as e:
+            logging.warning(f"Search batch of {len(batch)} documents failed, retrying individually: {e}")
+            failed_keys = {document["id"] for document in batch}
+
+        if not failed_keys:
+            logging.info(f"-> Indexed {len(batch)} documents in '{INDEX_NAME}'.")
+            return True
+
+        logging.info(f"-> Indexed {len(batch) - len(failed_keys)} documents; retrying {len(failed_keys)} individually.")
+        ok = True
+        for document in batch:
+            if document["id"] in failed_keys:
+                ok = self._upload_one(document) and ok
+        return ok
+
+    def _upload_one(self, document: dict) -> bool:
+        error = None
+        for attempt in range(SEARCH_SINK_RETRIES):
+            if attempt:
+                time.sleep(2 ** (attempt - 1))
+            try:
+                result = self._client.merge_or_upload_documents(documents=[document])[0]
+                if result.succeeded:
+                    return True
+                error = result.error_message
+            except Exception as e:
+                error = e
+        logging.error(f"Failed to index document id '{document['id']}' after {SEARCH_SINK_RETRIES} attempts: {error}")
+        return False
+
+    def _run_timer(self):
+        while not self._stop.wait(1):
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= SEARCH_SINK_MAX_WAIT_SECONDS
+            if due:
+                try:
+                    self.flush()
+                except Exception as e:
+                    logging.error(f"Background search flush failed: {e}", exc_info=True)
+
+_sink = None
+_sink_lock = threading.Lock()
+
+def get_search_sink() -> SearchSink:
+    """Returns this process's sink, creating its SearchClient on first use."""
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            client = SearchClient(
+                endpoint=AI_SEARCH_ENDPOINT,
+                index_name=INDEX_NAME,
+                credential=AzureKeyCredential(AI_SEARCH_KEY)
+            )
+            if SEARCH_INDEX_AUTO_UPDATE:
+                try:
+                    ensure_search_index()
+                except Exception as e:
+                    logging.error(f"Could not create or update search index '{INDEX_NAME}': {e}")
+            _sink = SearchSink(client)
+            # Whatever is still buffered when the host shuts the worker down gets written.
+            atexit.register(_sink.close)
+        return _sink
@@ -0,0 +1,23 @@
+# intelligence_processor/brain/tokens.py
+# Same helpers as common/tokens.py, for this separately deployed Function app.
+import tiktoken
+
+# cl100k_base is the encoding used by both gpt-4 and text-embedding-ada-002.
+_encoding = tiktoken.get_encoding("cl100k_base")
+
+def count_tokens(text: str) -> int:
+    return len(_encoding.encode(text or ""))
+
+def split_by_tokens(text: str, max_tokens: int, overlap: int = 0) -> list[str]:
+    """Splits text into windows of at most max_tokens, each repeating the last `overlap` tokens of the previous one."""
+    tokens = _encoding.encode(text or "")
+    if len(tokens) <= max_tokens:
+        return [text]
+
+    step = max_tokens - overlap
+    windows = []
+    for start in range(0, len(tokens), step):
+        windows.append(_encoding.decode(tokens[start:start + max_tokens]))
+        if start + max_tokens >= len(tokens):
+            break
+    return windows
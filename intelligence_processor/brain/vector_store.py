@@ -0,0 +1,206 @@
+# intelligence_processor/brain/vector_store.py
+# Pluggable storage for passage embeddings. The Function app writes through it and the Flask app
+# imports it as intelligence_processor.brain.vector_store to answer /brain/search, so only numpy
+# and the standard library are imported at module level; the Azure backend loads its SDK lazily.
+import os
+import json
+import logging
+import threading
+from typing import NamedTuple, Optional
+import numpy as np
+
+# "azure" (Azure AI Search, the default) or "local" (memory-mapped NumPy store under VECTOR_STORE_PATH).
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "azure").lower()
+VECTOR_STORE_PATH = os.getenv("VECTOR_STORE_PATH", "data/vector_store")
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "1536")) # text-embedding-ada-002
+
+class SearchHit(NamedTuple):
+    id: str
+    score: float
+    meeting_id: Optional[str]
+    passage_index: Optional[int]
+    text: Optional[str]
+
+class VectorStore:
+    """
+    Interface shared by the backends. Documents are the passage documents built by
+    vectorizer.vectorize_and_save: "id", "content_vector", "meeting_id", "passage_index",
+    "transcript_content" and any extra fields the backend chooses to keep.
+    """
+
+    def add(self, documents: list[dict]):
+        raise NotImplementedError
+
+    def flush(self) -> bool:
+        return True
+
+    def delete_meeting(self, meeting_id: str, keep_passages: int):
+        """Removes documents for the meeting that a re-index does not overwrite. Optional for backends."""
+
+    def search(self, query_vector, k: int = 10, meeting_ids: Optional[list[str]] = None) -> list[SearchHit]:
+        raise NotImplementedError
+
+class LocalVectorStore(VectorStore):
+    """
+    Stores L2-normalized float32 vectors in an append-only file (vectors.f32, one row per passage)
+    that is memory-mapped for search, with an id sidecar (ids.jsonl) holding one JSON line of
+    metadata per row. Search is a single matrix-vector product (cosine similarity on normalized
+    rows) followed by a partial sort, so tens of thousands of passages answer in a few milliseconds.
+    Re-adding an id appends a new row; the older row is masked out of results.
+    """
+
+    def __init__(self, path: str = VECTOR_STORE_PATH, dimensions: int = EMBEDDING_DIMENSIONS):
+        self.path = path
+        self.dimensions = dimensions
+        self._vectors_path = os.path.join(path, "vectors.f32")
+        self._ids_path = os.path.join(path, "ids.jsonl")
+        self._lock = threading.Lock()
+        self._loaded_size = -1
+        self._matrix = np.empty((0, dimensions), dtype=np.float32)
+        self._entries = []
+        self._ids_bytes = 0
+        self._live = np.empty(0, dtype=bool)
+        os.makedirs(path, exist_ok=True)
+        self._reload()
+
+    def _reload(self):
+        """(Re)maps the vector file if another process or instance appended to it."""
+        size = os.path.getsize(self._vectors_path) if os.path.exists(self._vectors_path) else 0
+        if size == self._loaded_size:
+            return
+
+        entries, offsets = [], [0]
+        if os.path.exists(self._ids_path):
+            with open(self._ids_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break # A torn final line from an interrupted append
+                    entries.append(json.loads(line))
+                    offsets.append(offsets[-1] + len(line))
+        row_bytes = self.dimensions * 4
+        # A crash between the two appends can leave one file longer than the other; trust the shorter.
+        rows = min(size // row_bytes, len(entries))
+        matrix = (np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dimensions))
+                  if rows else np.empty((0, self.dimensions), dtype=np.float32))
+
+        live = np.ones(rows, dtype=bool)
+        latest = {}
+        for row, entry in enumerate(entries[:rows]):
+            previous = latest.get(entry["id"])
+            if previous is not None:
+                live[previous] = False
+            latest[entry["id"]] = row
+
+        self._matrix, self._entries, self._live, self._loaded_size = matrix, entries[:rows], live, size
+        self._ids_bytes = offsets[rows]
+
+    def add(self, documents: list[dict]):
+        if not documents:
+            return
+        vectors = np.asarray([d["content_vector"] for d in documents], dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimensions:
+            raise ValueError(f"Expected vectors of {self.dimensions} dimensions, got shape {vectors.shape}")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            self._reload()
+            rows = len(self._entries)
+            # Drop anything an interrupted append left past the last complete row so both files stay aligned.
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(rows * self.dimensions * 4)
+                f.write(vectors.tobytes())
+            with open(self._ids_path, "ab") as f:
+                f.truncate(self._ids_bytes)
+                for d in documents:
+                    f.write((json.dumps({
+                        "id": d["id"],
+                        "meeting_id": d.get("meeting_id"),
+                        "passage_index": d.get("passage_index"),
+                        "text": d.get("transcript_content")
+                    }) + "\n").encode("utf-8"))
+            self._reload()
+        logging.info(f"-> Appended {len(documents)} vectors to the local store at {self.path}.")
+
+    def search(self, query_vector, k: int = 10, meeting_ids: Optional[list[str]] = None) -> list[SearchHit]:
+        with self._lock:
+            self._reload()
+            matrix, entries, live = self._matrix, self._entries, self._live
+        if not len(entries) or k <= 0:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        scores = matrix @ query
+        mask = live
+        if meeting_ids is not None:
+            allowed = set(meeting_ids)
+            mask = mask & np.fromiter((e.get("meeting_id") in allowed for e in entries), dtype=bool, count=len(entries))
+        scores = np.where(mask, scores, -np.inf)
+
+        k = min(k, int(mask.sum()))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            SearchHit(entries[i]["id"], float(scores[i]), entries[i].get("meeting_id"),
+                      entries[i].get("passage_index"), entries[i].get("text"))
+            for i in top
+        ]
+
+class AzureSearchVectorStore(VectorStore):
+    """Azure AI Search (meeting-brain-index). Writes go through the buffered search sink."""
+
+    def add(self, documents: list[dict]):
+        from .search_sink import get_search_sink
+        get_search_sink().add(documents)
+
+    def flush(self) -> bool:
+        from .search_sink import get_search_sink
+        return get_search_sink().flush()
+
+    def delete_meeting(self, meeting_id: str, keep_passages: int):
+        from .search_sink import get_search_sink
+        get_search_sink().delete_meeting(meeting_id, keep_passages)
+
+    def search(self, query_vector, k: int = 10, meeting_ids: Optional[list[str]] = None) -> list[SearchHit]:
+        from azure.search.documents.models import VectorizedQuery
+        from .search_sink import get_search_sink
+
+        search_filter = None
+        if meeting_ids is not None:
+            if not meeting_ids:
+                return []
+            search_filter = "search.in(meeting_id, '{}', ',')".format(",".join(m.replace("'", "''") for m in meeting_ids))
+
+        results = get_search_sink().client.search(
+            search_text=None,
+            vector_queries=[VectorizedQuery(vector=list(query_vector), k_nearest_neighbors=k, fields="content_vector")],
+            filter=search_filter,
+            select=["id", "meeting_id", "passage_index", "transcript_content"],
+            top=k
+        )
+        return [
+            SearchHit(r["id"], float(r["@search.score"]), r.get("meeting_id"), r.get("passage_index"), r.get("transcript_content"))
+            for r in results
+        ]
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_vector_store() -> VectorStore:
+    """Returns the process-wide store selected by VECTOR_STORE_BACKEND."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if VECTOR_STORE_BACKEND == "local":
+                _store = LocalVectorStore()
+            elif VECTOR_STORE_BACKEND == "azure":
+                _store = AzureSearchVectorStore()
+            else:
+                raise ValueError(f"Unknown VECTOR_STORE_BACKEND '{VECTOR_STORE_BACKEND}'")
+        return _store
@@ -1,21 +1,21 @@
 # intelligence_processor/brain/vectorizer.py
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from openai import AzureOpenAI
-from azure.core.credentials import AzureKeyCredential
-from azure.search.documents import SearchClient
+from brain.vector_store import get_vector_store
+from brain.llm_cache import cached_call, cached_batch_call
+from brain.rate_limiter import call_with_rate_limit
+from brain.tokens import split_by_tokens, count_tokens
 
 # --- Configuration ---
-INDEX_NAME = "meeting-brain-index"
-AI_SEARCH_ENDPOINT = os.getenv("AI_SEARCH_ENDPOINT")
-AI_SEARCH_KEY = os.getenv("AI_SEARCH_KEY")
-
 # Re-use the OpenAI client for creating embeddings
 try:
     openai_client = AzureOpenAI(
         api_key=os.getenv("OPENAI_API_KEY"),  
         api_version="2023-07-01-preview",
-        azure_endpoint=os.getenv("OPENAI_ENDPOINT")
+        azure_endpoint=os.getenv("OPENAI_ENDPOINT"),
+        max_retries=0 # 429s are retried by brain.rate_limiter, which counts them against the shared quota
     )
     # The name of your embedding model deployment
     EMBEDDING_MODEL_NAME = "text-embedding-ada-002"
@@ -23,54 +23,106 @@ except Exception as e:
     logging.error(f"Failed to initialize OpenAI client for embeddings: {e}")
     raise
 
+# Transcripts are indexed as overlapping token-bounded passages (ada-002 accepts 8191 tokens per input),
+# embedded EMBEDDING_BATCH_SIZE inputs per request with up to EMBEDDING_CONCURRENCY requests in flight.
+PASSAGE_TOKENS = int(os.getenv("PASSAGE_TOKENS", "500"))
+PASSAGE_OVERLAP_TOKENS = int(os.getenv("PASSAGE_OVERLAP_TOKENS", "50"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "16"))
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+
 def get_embedding(text: str) -> list[float]:
-    """Generates a vector embedding for the given text."""
-    response = openai_client.embeddings.create(
-        input=text,
-        model=EMBEDDING_MODEL_NAME
-    )
-    return response.data[0].embedding
+    """Generates a vector embedding for the given text. Identical text is served from the LLM cache."""
+    def call():
+        response = call_with_rate_limit(
+            EMBEDDING_MODEL_NAME, count_tokens(text),
+            lambda: openai_client.embeddings.create(
+                input=text,
+                model=EMBEDDING_MODEL_NAME
+            )
+        )
+        return response.data[0].embedding
+
+    return cached_call(EMBEDDING_MODEL_NAME, "embedding", text, {}, call)
+
+def _embed_batch(texts: list[str]) -> list[list[float]]:
+    def call(missing):
+        response = call_with_rate_limit(
+            EMBEDDING_MODEL_NAME, sum(count_tokens(t) for t in missing),
+            lambda: openai_client.embeddings.create(
+                input=missing,
+                model=EMBEDDING_MODEL_NAME
+            )
+        )
+        # The API may return items out of order; each carries the index of its input.
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    return cached_batch_call(EMBEDDING_MODEL_NAME, "embedding", texts, {}, call)
 
-def vectorize_and_save(transcript_text: str, classification_result: dict, meeting_id: str, meeting_date: str):
+def get_embeddings(texts: list[str]) -> list[list[float]]:
+    """Embeds many texts, EMBEDDING_BATCH_SIZE per request and EMBEDDING_CONCURRENCY requests at a time."""
+    batches = [texts[i:i + EMBEDDING_BATCH_SIZE] for i in range(0, len(texts), EMBEDDING_BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=EMBEDDING_CONCURRENCY) as pool:
+        results = list(pool.map(_embed_batch, batches))
+    return [embedding for batch in results for embedding in batch]
+
+def split_into_passages(transcript_text: str) -> list[str]:
+    return [p for p in split_by_tokens(transcript_text, PASSAGE_TOKENS, PASSAGE_OVERLAP_TOKENS) if p.strip()]
+
+def vectorize_and_save(transcript_text: str, classification_result: dict, meeting_id: str, meeting_date: str, flush: bool = False):
     """
-    Creates vector embeddings and saves the data to Azure AI Search.
+    Splits the transcript into passages, embeds them and saves one search document per passage
+    to Azure AI Search (schema: search_sink.build_search_index). Passage documents have ids "{meeting_id}-{index}" and carry meeting_id
+    and passage_index so results can be grouped by meeting and point at the matching moment.
+    Documents go to the configured vector store (Azure AI Search through the buffered search sink
+    by default, or the local store); pass flush=True to write them before returning. A failed
+    flush raises; other errors are logged and return False.
     """
     logging.info(f"-> Starting vectorization for meeting {meeting_id}...")
 
     try:
-        # 1. Generate the vector embedding for the transcript
-        embedding = get_embedding(transcript_text)
+        # 1. Split into token-bounded passages and embed them in batches
+        passages = split_into_passages(transcript_text)
+        if not passages:
+            logging.warning(f"Transcript for meeting {meeting_id} is empty. Nothing to vectorize.")
+            return True
+        embeddings = get_embeddings(passages)
+        logging.info(f"-> Embedded {len(passages)} passages for meeting {meeting_id}.")
         
-        # 2. Prepare the document to be uploaded
-        document = {
-            "id": meeting_id,
-            "meeting_date": meeting_date,
-            "transcript_content": transcript_text,
-            "summary_content": "Summary will be added later.", # Placeholder for now
-            "content_vector": embedding,
-            "subsidiary": classification_result.get("subsidiary"),
-            "department": classification_result.get("department"),
-            "participants": ["Syed Owais", "Rain"], # Placeholder
-            "tags": classification_result.get("tags", [])
-        }
-        
-        # 3. Upload the document to Azure AI Search
-        search_client = SearchClient(
-            endpoint=AI_SEARCH_ENDPOINT,
-            index_name=INDEX_NAME,
-            credential=AzureKeyCredential(AI_SEARCH_KEY)
-        )
+        # 2. Prepare one document per passage
+        documents = [
+            {
+                "id": f"{meeting_id}-{index}",
+                "meeting_id": meeting_id,
+                "passage_index": index,
+                "meeting_date": meeting_date,
+                "transcript_content": passage,
+                "summary_content": "Summary will be added later.", # Placeholder for now
+                "content_vector": embedding,
+                "subsidiary": classification_result.get("subsidiary"),
+                "department": classification_result.get("department"),
+                "participants": ["Syed Owais", "Rain"], # Placeholder
+                "tags": classification_result.get("tags", [])
+            }
+            for index, (passage, embedding) in enumerate(zip(passages, embeddings))
+        ]
         
-        result = search_client.upload_documents(documents=[document])
-        
-        if result[0].succeeded:
-            logging.info(f"-> Successfully vectorized and saved document id '{meeting_id}' to Azure AI Search.")
-        else:
-            logging.error(f"Failed to save document id '{meeting_id}': {result[0].error_message}")
-            return False
+        # 3. Hand the passage documents to the vector store
+        store = get_vector_store()
+        store.add(documents)
+        logging.info(f"-> Vectorized {len(documents)} passages for meeting '{meeting_id}' and queued them for the vector store.")
+
+        # 4. Drop the pre-passage whole-transcript document and passages beyond the new count
+        try:
+            store.delete_meeting(meeting_id, keep_passages=len(documents))
+        except Exception as e:
+            logging.warning(f"Could not remove stale search documents for meeting '{meeting_id}': {e}")
 
     except Exception as e:
         logging.error(f"An error occurred during vectorization: {e}", exc_info=True)
         return False
+
+    # Raised rather than returned so the blob trigger fails and the platform retries the meeting.
+    if flush and not get_vector_store().flush():
+        raise RuntimeError(f"Some passages for meeting '{meeting_id}' could not be saved to the vector store.")
         
     return True
\ No newline at end of file
@@ -1,7 +1,7 @@
 # models.py
 import datetime
 from sqlalchemy import (
-    create_engine, Column, Integer, String, Text, DateTime, ForeignKey, Index
+    create_engine, Column, Integer, Float, String, Text, DateTime, ForeignKey, Index
 )
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.dialects.postgresql import JSONB
@@ -29,6 +29,7 @@ class ScheduledMeeting(Base):
     meeting_id = Column(String, primary_key=True)
     topic = Column(Text)
     start_time = Column(DateTime)
+    end_time = Column(DateTime) # start_time + duration, kept so overlap checks can use an index
     duration = Column(Integer)
     agenda = Column(Text)
     participants = Column(Text) # Storing as JSON string
@@ -36,6 +37,12 @@ class ScheduledMeeting(Base):
     created_by_email = Column(String)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
+    # Double-booking is also rejected by the excl_scheduled_meetings_host_overlap
+    # exclusion constraint (GiST over host_email + tsrange(start_time, end_time)), see alembic.
+    __table_args__ = (
+        Index('idx_scheduled_meetings_host_window', host_email, start_time, end_time),
+    )
+
 class MeetingLog(Base):
     __tablename__ = 'meeting_logs'
     
@@ -57,6 +64,7 @@ class MeetingLog(Base):
     tags = Column(JSONB) # Using JSONB for better tag querying
     key_decisions = Column(JSONB)
     enriched_output_path = Column(Text) # Path to the final JSON in blob storage
+    fused_analysis = Column(JSONB) # Single-pass summary + classification from phase 1 (FUSED_LLM_PASS)
 
     # Relationship for Phase 2
     training_moments = relationship("TrainingQueue", back_populates="meeting")
@@ -72,6 +80,29 @@ class MeetingProcessingLog(Base):
     meeting_id = Column(String, primary_key=True)
     processed_at = Column(DateTime, default=datetime.datetime.utcnow)
 
+# --- LLM RESPONSE CACHE (summaries, classifications, embeddings) ---
+class LLMCacheEntry(Base):
+    __tablename__ = 'llm_cache_entries'
+
+    cache_key = Column(String(64), primary_key=True) # sha256 of model, template version, input and params
+    model = Column(String, nullable=False)
+    template_version = Column(String, nullable=False)
+    response = Column(JSONB, nullable=False)
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+
+# --- SHARED API RATE LIMIT BUCKETS (one row per model/deployment) ---
+class RateLimitBucket(Base):
+    __tablename__ = 'rate_limit_buckets'
+
+    name = Column(String, primary_key=True)
+    request_tokens = Column(Float, nullable=False) # Requests that may start now (refills at RPM / 60 per second)
+    token_tokens = Column(Float, nullable=False) # Model tokens that may be spent now (refills at TPM / 60 per second)
+    backoff_seconds = Column(Float, nullable=False, default=0) # Grows on 429s, decays once calls succeed again
+    backoff_until = Column(DateTime)
+    updated_at = Column(DateTime, nullable=False)
+
 # --- NEW TABLE FOR PHASE 2 ---
 class TrainingQueue(Base):
     __tablename__ = 'training_queue'
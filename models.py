@@ -1,7 +1,7 @@
 # models.py
 import datetime
 from sqlalchemy import (
-    create_engine, Column, Integer, String, Text, DateTime, ForeignKey, Index
+    create_engine, Column, Integer, Float, String, Text, DateTime, ForeignKey, Index
 )
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.dialects.postgresql import JSONB
@@ -29,6 +29,7 @@ class ScheduledMeeting(Base):
     meeting_id = Column(String, primary_key=True)
     topic = Column(Text)
     start_time = Column(DateTime)
+    end_time = Column(DateTime) # start_time + duration, kept so overlap checks can use an index
     duration = Column(Integer)
     agenda = Column(Text)
     participants = Column(Text) # Storing as JSON string
@@ -36,6 +37,12 @@ class ScheduledMeeting(Base):
     created_by_email = Column(String)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
+    # Double-booking is also rejected by the excl_scheduled_meetings_host_overlap
+    # exclusion constraint (GiST over host_email + tsrange(start_time, end_time)), see alembic.
+    __table_args__ = (
+        Index('idx_scheduled_meetings_host_window', host_email, start_time, end_time),
+    )
+
 class MeetingLog(Base):
     __tablename__ = 'meeting_logs'
     
@@ -57,6 +64,7 @@ class MeetingLog(Base):
     tags = Column(JSONB) # Using JSONB for better tag querying
     key_decisions = Column(JSONB)
     enriched_output_path = Column(Text) # Path to the final JSON in blob storage
+    fused_analysis = Column(JSONB) # Single-pass summary + classification from phase 1 (FUSED_LLM_PASS)
 
     # Relationship for Phase 2
     training_moments = relationship("TrainingQueue", back_populates="meeting")
@@ -72,6 +80,91 @@ class MeetingProcessingLog(Base):
     meeting_id = Column(String, primary_key=True)
     processed_at = Column(DateTime, default=datetime.datetime.utcnow)
 
+# --- SHARED OAUTH TOKENS (e.g. Zoom server token) ---
+class ServiceToken(Base):
+    __tablename__ = 'service_tokens'
+
+    name = Column(String, primary_key=True)
+    access_token = Column(Text)
+    expires_at = Column(DateTime)
+
+# --- CROSS-REPLICA PROCESSING CLAIMS ---
+class MeetingClaim(Base):
+    __tablename__ = 'meeting_claims'
+
+    meeting_id = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)
+    claimed_at = Column(DateTime, nullable=False)
+    lease_expires_at = Column(DateTime, nullable=False)
+
+# --- PER-MEETING PIPELINE CHECKPOINTS ---
+class MeetingPipelineState(Base):
+    __tablename__ = 'meeting_pipeline_state'
+
+    meeting_id = Column(String, primary_key=True)
+    stage = Column(String(30), nullable=False) # Last completed stage, see backend.pipeline.STAGES
+    audio_blob_path = Column(Text)
+    audio_sha256 = Column(String(64))
+    transcript = Column(Text)
+    summary = Column(Text)
+    fused_analysis = Column(JSONB)
+    recipients = Column(Text) # Storing as JSON string
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+# --- CONTENT-ADDRESSED TRANSCRIPT CACHE ---
+class TranscriptCache(Base):
+    __tablename__ = 'transcript_cache'
+
+    audio_sha256 = Column(String(64), primary_key=True)
+    transcript = Column(Text, nullable=False)
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+    last_hit_at = Column(DateTime)
+
+# --- LLM RESPONSE CACHE (summaries, classifications, embeddings) ---
+class LLMCacheEntry(Base):
+    __tablename__ = 'llm_cache_entries'
+
+    cache_key = Column(String(64), primary_key=True) # sha256 of model, template version, input and params
+    model = Column(String, nullable=False)
+    template_version = Column(String, nullable=False)
+    response = Column(JSONB, nullable=False)
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+
+# --- SHARED API RATE LIMIT BUCKETS (one row per model/deployment) ---
+class RateLimitBucket(Base):
+    __tablename__ = 'rate_limit_buckets'
+
+    name = Column(String, primary_key=True)
+    request_tokens = Column(Float, nullable=False) # Requests that may start now (refills at RPM / 60 per second)
+    token_tokens = Column(Float, nullable=False) # Model tokens that may be spent now (refills at TPM / 60 per second)
+    backoff_seconds = Column(Float, nullable=False, default=0) # Grows on 429s, decays once calls succeed again
+    backoff_until = Column(DateTime)
+    updated_at = Column(DateTime, nullable=False)
+
+# --- BACKGROUND JOB QUEUE FOR WEBHOOK EVENTS ---
+class ProcessingJob(Base):
+    __tablename__ = 'processing_jobs'
+
+    id = Column(Integer, primary_key=True)
+    meeting_id = Column(String, nullable=False, index=True)
+    event_type = Column(String, nullable=False)
+    payload = Column(JSONB, nullable=False) # The raw Zoom webhook payload
+    status = Column(String(20), nullable=False, default='pending') # pending | running | done | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
+    locked_by = Column(String)
+    locked_at = Column(DateTime)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_processing_jobs_status_available', status, available_at),
+    )
+
 # --- NEW TABLE FOR PHASE 2 ---
 class TrainingQueue(Base):
     __tablename__ = 'training_queue'